@@ -0,0 +1 @@
+"""Benchmark harness for core database and document operations (see benchmarks/run.py)"""
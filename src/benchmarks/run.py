@@ -0,0 +1,360 @@
+"""Benchmark core database operations on synthetic tables.
+
+    cd src
+    python -m benchmarks.run --sizes 10k,1m,10m --output results.json
+    python -m benchmarks.run --backend mysql --sizes 10k
+
+The default backend is a throwaway SQLite database behind the pymysql
+shim in benchmarks/sqlite_shim.py; `--backend mysql` uses the server from
+config/mysql_config.json and drops its bench_* tables afterwards.
+Document search runs against the in-memory fallback store unless
+`--docstore mongo` is given (mongomock has no $text support).
+Results are written as JSON with stable keys so runs can be diffed.
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+if __package__ in (None, ""):
+    # Allow `python benchmarks/run.py` as well as `python -m benchmarks.run`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.transformation import DATABASE
+
+logger = logging.getLogger("benchmarks")
+
+FIRST_NAMES = ["Aya", "Atif", "Banan", "Nadia", "Omar", "Sara", "Yousif", "Huda", "Khalid", "Mona"]
+LAST_NAMES = ["Musa", "Abdoon", "Ahmed", "David", "Hassan", "Ali", "Osman", "Ibrahim", "Salih", "Nour"]
+CITIES = [f"city_{i:02d}" for i in range(50)]
+WORDS = ("drilling rate penetration pressure casing mud weight formation depth bit torque "
+         "report survey well pump flow sample core analysis temperature porosity").split()
+
+TABLE_DDL = ("CREATE TABLE `{table}` (`id` INT AUTO_INCREMENT PRIMARY KEY, `first_name` VARCHAR(64), "
+             "`last_name` VARCHAR(64), `city` VARCHAR(64), `score` INT, `created` DATETIME)")
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def synthetic_rows(count, rng, start=0):
+    base = datetime.datetime(2020, 1, 1)
+    for i in range(start, start + count):
+        yield {
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "city": rng.choice(CITIES),
+            "score": rng.randint(0, 1000),
+            "created": (base + datetime.timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {"mean": round(statistics.fmean(ordered), 6), "p50": round(pick(0.50), 6),
+            "p95": round(pick(0.95), 6), "p99": round(pick(0.99), 6), "max": round(ordered[-1], 6)}
+
+
+class Benchmark:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.rng = random.Random(args.seed)
+        self.results = []
+        from core.transform_manager import TransformManager
+        self.transform_mgr = TransformManager()
+
+    # --- bookkeeping -----------------------------------------------------------
+
+    def record(self, size, operation, seconds=None, rows=None, samples=None, skipped=None, **extra):
+        result = {"size": size, "operation": operation}
+        if skipped:
+            result["skipped"] = skipped
+        else:
+            result["seconds"] = round(seconds, 6)
+            if rows is not None:
+                result["rows"] = rows
+                result["rows_per_second"] = round(rows / seconds, 1) if seconds > 0 else None
+            if samples:
+                result["latency"] = percentiles(samples)
+                result["ops_per_second"] = round(len(samples) / sum(samples), 1) if sum(samples) > 0 else None
+            result["statements"] = sum(s["count"] for s in DATABASE.instrumentation.stats().values())
+        result.update(extra)
+        self.results.append(result)
+        logger.info("%s", result)
+        return result
+
+    def timed(self, fn, *args, **kwargs):
+        DATABASE.instrumentation.reset()
+        started = time.perf_counter()
+        value = fn(*args, **kwargs)
+        return time.perf_counter() - started, value
+
+    def check(self, value, what):
+        if value is False:
+            raise RuntimeError(f"{what} failed: {DATABASE.last_error}")
+        return value
+
+    # --- operations ------------------------------------------------------------
+
+    def run_size(self, size):
+        table = f"bench_{size}"
+        self.check(DATABASE._execute_sql(f"DROP TABLE IF EXISTS `{table}`"), "drop table")
+        self.check(DATABASE._execute_sql(TABLE_DDL.format(table=table)), "create table")
+        try:
+            self.bench_insert_batch(size, table)
+            self.bench_dynamic_insert(size, table)
+            self.bench_get_table_metadata(size, table)
+            self.bench_fetch_page(size, table)
+            self.bench_conditional_update(size, table)
+            self.bench_merge_columns(size, table)
+            self.bench_import_dataset(size)
+            self.bench_search_documents(size)
+        finally:
+            if not self.args.keep_tables:
+                DATABASE._execute_sql(f"DROP TABLE IF EXISTS `{table}`")
+
+    def bench_insert_batch(self, size, table):
+        """Fill the table through the insert_batch plugin, `--batch-rows` rows per call"""
+        insert_batch = self.transform_mgr.operations.get("insert_batch")
+        if insert_batch is None:
+            return self.record(size, "insert_batch", skipped="insert_batch plugin not loaded")
+        total_seconds, calls, statements = 0.0, 0, 0
+        for start in range(0, size, self.args.batch_rows):
+            values = list(synthetic_rows(min(self.args.batch_rows, size - start), self.rng, start))
+            seconds, ok = self.timed(insert_batch, table, {"values_list": values, "chunk_size": 1000})
+            self.check(ok, "insert_batch")
+            total_seconds += seconds
+            calls += 1
+            statements += sum(s["count"] for s in DATABASE.instrumentation.stats().values())
+        result = self.record(size, "insert_batch", total_seconds, rows=size, calls=calls)
+        result["statements"] = statements
+
+    def bench_dynamic_insert(self, size, table):
+        samples = []
+        DATABASE.instrumentation.reset()
+        for row in synthetic_rows(self.args.samples, self.rng, size):
+            started = time.perf_counter()
+            self.check(DATABASE.dynamic_insert(table, row), "dynamic_insert")
+            samples.append(time.perf_counter() - started)
+        self.record(size, "dynamic_insert", sum(samples), rows=len(samples), samples=samples)
+
+    def bench_get_table_metadata(self, size, table):
+        if size > self.args.metadata_limit:
+            return self.record(size, "get_table_metadata",
+                               skipped=f"reads the whole table; above --metadata-limit {self.args.metadata_limit}")
+        seconds, (columns, data, _) = self.timed(DATABASE.get_table_metadata, table)
+        self.record(size, "get_table_metadata", seconds, rows=len(data))
+
+    def bench_fetch_page(self, size, table):
+        """Paged replacement for get_table_metadata: first page and a page in the middle"""
+        columns, keys = DATABASE.get_table_columns(table)
+        samples = []
+        DATABASE.instrumentation.reset()
+        for _ in range(self.args.repeat):
+            started = time.perf_counter()
+            DATABASE.fetch_page(table, keys, limit=500)
+            middle = DATABASE.key_at_offset(table, keys, size // 2)
+            DATABASE.fetch_page(table, keys, after_key=middle, limit=500)
+            samples.append(time.perf_counter() - started)
+        self.record(size, "fetch_page", sum(samples), samples=samples)
+
+    def bench_conditional_update(self, size, table):
+        samples, rows = [], 0
+        DATABASE.instrumentation.reset()
+        for i in range(self.args.repeat):
+            source, target = ("city_00", "city_xx") if i % 2 == 0 else ("city_xx", "city_00")
+            started = time.perf_counter()
+            affected = self.check(DATABASE.conditional_update(table, {"city": source}, {"city": target}),
+                                  "conditional_update")
+            samples.append(time.perf_counter() - started)
+            rows += affected
+        self.record(size, "conditional_update", sum(samples), rows=rows, samples=samples)
+
+    def bench_merge_columns(self, size, table):
+        samples = []
+        for i in range(self.args.repeat):
+            column = f"full_name_{i}"
+            seconds, ok = self.timed(DATABASE.merge_columns, table, ["first_name", "last_name"], column)
+            self.check(ok, "merge_columns")
+            samples.append(seconds)
+            DATABASE.remove_column(table, column)
+        rows = DATABASE._query(f"SELECT COUNT(*) FROM `{table}`", fetch="one")[0]
+        self.record(size, "merge_columns", sum(samples), rows=rows * len(samples), samples=samples)
+
+        # Generated column: DDL only, no row writes
+        samples = []
+        for i in range(self.args.repeat):
+            column = f"full_name_virtual_{i}"
+            seconds, ok = self.timed(DATABASE.merge_columns, table, ["first_name", "last_name"], column,
+                                     mode="virtual")
+            self.check(ok, "merge_columns (virtual)")
+            samples.append(seconds)
+            DATABASE.remove_column(table, column)
+        self.record(size, "merge_columns_virtual", sum(samples), rows=rows * len(samples), samples=samples)
+
+    def bench_import_dataset(self, size):
+        try:
+            import pandas  # noqa: F401 - the importer needs it
+        except ImportError:
+            return self.record(size, "import_dataset", skipped="pandas is not installed")
+        from core.importer import DatasetImporter
+        path = os.path.join(self.workdir, f"bench_{size}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["first_name", "last_name", "city", "score", "created"])
+            writer.writeheader()
+            writer.writerows(synthetic_rows(size, self.rng))
+        engine = None
+        if self.args.backend == "sqlite":
+            from sqlalchemy import create_engine
+            engine = create_engine(f"sqlite:///{self.database_path}")
+        importer = DatasetImporter(DATABASE, engine=engine)
+        table = f"bench_import_{size}"
+        try:
+            seconds, result = self.timed(importer.import_file, path, table)
+            self.record(size, "import_dataset", seconds, rows=result["rows"], method=result["method"],
+                        file_bytes=os.path.getsize(path))
+        finally:
+            os.remove(path)
+            DATABASE._execute_sql(f"DROP TABLE IF EXISTS `{table}`")
+            if engine is not None:
+                engine.dispose()
+
+    def bench_search_documents(self, size):
+        count = min(size, self.args.max_documents)
+        try:
+            store = self.document_store(count)
+        except Exception as e:
+            return self.record(size, "search_documents", skipped=f"document store unavailable: {e}")
+        try:
+            samples, hits = [], 0
+            for i in range(self.args.repeat * 5):
+                term = WORDS[i % len(WORDS)]
+                started = time.perf_counter()
+                hits += len(store.search_documents(term))
+                samples.append(time.perf_counter() - started)
+            self.record(size, "search_documents", sum(samples), samples=samples, documents=count,
+                        hits=hits, docstore=self.args.docstore)
+        finally:
+            if store.client is not None:
+                store.client.drop_database(store.db.name)
+
+    def document_store(self, count):
+        from core.document_db import DocumentDatabase
+        store = DocumentDatabase(connect=False, local_path=os.path.join(self.workdir, f"documents_{count}.sqlite3"))
+        documents = []
+        for i in range(count):
+            text = " ".join(self.rng.choice(WORDS) for _ in range(self.args.document_words))
+            documents.append({"file_name": f"doc_{i}.pdf", "file_type": "application/pdf",
+                              "extracted_text": text, "metadata": {"pages": 1},
+                              "created_at": datetime.datetime.utcnow()})
+        if self.args.docstore == "mongo":
+            store.config = dict(store.config, database=store.config.get("database", "document_db") + "_bench")
+            store.connect()
+            if store.client is None:
+                raise RuntimeError("MongoDB is not reachable")
+            store.db.documents.insert_many(documents)
+            store.db.documents.create_index([("extracted_text", "text")])
+        else:
+            for i, doc in enumerate(documents):
+                content = doc["extracted_text"].encode()
+                store.local.insert(doc["file_name"], doc["file_type"], content, doc["extracted_text"],
+                                   doc["metadata"], hashlib.sha256(content).hexdigest())
+            store.reindex_fallback()
+        return store
+
+    # --- backends --------------------------------------------------------------
+
+    def setup_backend(self):
+        if self.args.backend == "sqlite":
+            from benchmarks.sqlite_shim import connection_factory
+            self.database_path = os.path.join(self.workdir, "bench.sqlite3")
+            DATABASE.config = dict(DATABASE.config, database="bench")
+            DATABASE.use_connection_factory(connection_factory(self.database_path))
+        else:
+            DATABASE.connect()
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                    text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except Exception:
+            commit = None
+        meta = {
+            "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": commit or None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": self.args.backend,
+            "docstore": self.args.docstore,
+            "seed": self.args.seed,
+            "repeat": self.args.repeat,
+            "samples": self.args.samples,
+        }
+        if self.args.backend == "sqlite":
+            meta["sqlite"] = sqlite3.sqlite_version
+        return meta
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10k,1m,10m", help="comma separated row counts (default 10k,1m,10m)")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--docstore", choices=["fallback", "mongo"], default="fallback")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each whole-table operation")
+    parser.add_argument("--samples", type=int, default=1000, help="single-row inserts to time per size")
+    parser.add_argument("--batch-rows", type=int, default=100000, help="rows per insert_batch call")
+    parser.add_argument("--metadata-limit", type=int, default=1000000,
+                        help="skip get_table_metadata (SELECT *) above this many rows")
+    parser.add_argument("--max-documents", type=int, default=100000, help="documents to search per size")
+    parser.add_argument("--document-words", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-tables", action="store_true")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        bench = Benchmark(args, workdir)
+        bench.setup_backend()
+        for size in sorted(parse_size(s) for s in args.sizes.split(",")):
+            bench.run_size(size)
+        output = {"meta": bench.metadata(), "results": bench.results}
+    finally:
+        DATABASE.pool.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(output, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""pymysql-compatible connections backed by SQLite, for benchmarks without a MySQL server.
+
+Only what DatabaseOperations sends is emulated: `%s` placeholders, the
+information_schema/SHOW queries used by the schema cache and metadata
+lookups, CONCAT_WS, AUTO_INCREMENT keys, ALTER TABLE with several
+clauses (including ADD INDEX) or MySQL-only options, and the temporary
+staging table and UPDATE ... JOIN of vectorized operations. Timings are indicative of the Python-side
+cost of each operation, not of MySQL server performance.
+"""
+import re
+import sqlite3
+
+_PLACEHOLDER = re.compile(r"%s")
+_SHOW_COLUMNS = re.compile(r"^\s*SHOW\s+COLUMNS\s+FROM\s+`?(\w+)`?(?:\s+WHERE\s+Field\s*=\s*%s)?", re.I)
+_SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES(?:\s+LIKE\s+%s)?", re.I)
+_ALTER = re.compile(r"^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+(.*)$", re.I | re.S)
+_CHANGE = re.compile(r"^CHANGE\s+COLUMN\s+`?(\w+)`?\s+`?(\w+)`?", re.I)
+_RENAME = re.compile(r"^RENAME\s+COLUMN\s+`?(\w+)`?\s+TO\s+`?(\w+)`?", re.I)
+_MYSQL_OPTION = re.compile(r"^(ALGORITHM|LOCK)\s*=", re.I)
+_ADD_INDEX = re.compile(r"^ADD\s+INDEX\s+`?(\w+)`?\s*(\(.*\))$", re.I | re.S)
+_CREATE_SELECT = re.compile(r"^(\s*CREATE\s+TEMPORARY\s+TABLE\s+`?\w+`?)\s*\(PRIMARY\s+KEY\s*\([^)]*\)\)\s*SELECT", re.I)
+_DROP_TEMPORARY = re.compile(r"^\s*DROP\s+TEMPORARY\s+TABLE", re.I)
+_UPDATE_JOIN = re.compile(r"^\s*UPDATE\s+`?(\w+)`?\s+AS\s+(\w+)\s+JOIN\s+`?(\w+)`?\s+AS\s+(\w+)\s+ON\s+(.*?)"
+                          r"\s+SET\s+(.*?)(?:\s+WHERE\s+(.*))?$", re.I | re.S)
+
+
+def concat_ws(separator, *values):
+    return separator.join(str(value) for value in values if value is not None)
+
+
+def split_clauses(text):
+    """Split an ALTER TABLE clause list on top-level commas"""
+    clauses, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            clauses.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        clauses.append("".join(current).strip())
+    return clauses
+
+
+class ShimCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+        self._rows = None  # emulated result set
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._cursor.close()
+
+    def execute(self, query, params=()):
+        params = tuple(params or ())
+        self._rows = None
+        emulated = self._emulate(query, params)
+        if emulated is not None:
+            self._rows = list(emulated)
+            self.rowcount = len(self._rows)
+            return self.rowcount
+        for statement in self._translate(query):
+            self._cursor.execute(statement, params if "?" in statement else ())
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def executemany(self, query, seq_of_params):
+        self._rows = None
+        self._cursor.executemany(_PLACEHOLDER.sub("?", query), [tuple(p) for p in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return tuple(rows)
+        return tuple(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return tuple(rows)
+        return tuple(self._cursor.fetchall())
+
+    # --- MySQL-only statements -------------------------------------------------
+
+    def _emulate(self, query, params):
+        upper = query.upper()
+        if "INFORMATION_SCHEMA.COLUMNS" in upper:
+            return self._information_schema_columns(params[0])
+        if "INFORMATION_SCHEMA.TABLES" in upper:
+            if not self._table_exists(params[0]):
+                return []
+            return [self._cursor.execute(f'SELECT COUNT(*) FROM "{params[0]}"').fetchone()]
+        if upper.lstrip().startswith("SELECT @@"):
+            return [(0,)]  # local_infile is off, so imports use multi-row inserts
+        if upper.lstrip().startswith("SET "):
+            return []
+        match = _SHOW_TABLES.match(query)
+        if match:
+            names = [row[0] for row in self._tables()]
+            if params:
+                names = [name for name in names if name == params[0]]
+            return [(name,) for name in names]
+        match = _SHOW_COLUMNS.match(query)
+        if match:
+            rows = [(c[0], c[2], c[3], c[6], c[4], c[5]) for c in self._information_schema_columns(match.group(1))]
+            if params:
+                rows = [row for row in rows if row[0].lower() == str(params[0]).lower()]
+            return rows
+        return None
+
+    def _tables(self):
+        return self._cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+
+    def _table_exists(self, table_name):
+        return any(row[0] == table_name for row in self._tables())
+
+    def _information_schema_columns(self, table_name):
+        """Rows shaped like core.schema_cache.COLUMNS_QUERY"""
+        if not self._table_exists(table_name):
+            return []
+        info = self._cursor.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+        foreign = {row[3] for row in self._cursor.execute(f'PRAGMA foreign_key_list("{table_name}")').fetchall()}
+        rows = []
+        for _, name, declared, notnull, default, pk in info:
+            column_type = (declared or "text").lower()
+            data_type = column_type.split("(")[0].strip()
+            extra = "auto_increment" if pk and data_type == "integer" else ""
+            nullable = "NO" if notnull or pk else "YES"
+            rows.append((name, data_type, column_type, nullable, default, extra,
+                         "PRI" if pk else "", "", int(name in foreign)))
+        return rows
+
+    def _translate(self, query):
+        """SQLite statements for one MySQL statement"""
+        query = query.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+        query = _PLACEHOLDER.sub("?", query).replace("<=>", " IS ")
+        query = _CREATE_SELECT.sub(r"\1 AS SELECT", query)
+        query = _DROP_TEMPORARY.sub("DROP TABLE", query)
+        join = _UPDATE_JOIN.match(query)
+        if join:
+            # UPDATE ... FROM: the target is not qualified on the left of SET
+            table, alias, source, source_alias, on, assignments, where = join.groups()
+            assignments = re.sub(rf"\b{alias}\.(`?\w+`?)\s*=", r"\1 =", assignments)
+            condition = f"{on} AND ({where})" if where else on
+            return [f'UPDATE "{table}" AS {alias} SET {assignments} FROM "{source}" AS {source_alias} WHERE {condition}']
+        match = _ALTER.match(query)
+        if not match:
+            return [query]
+        table, clauses = match.group(1), split_clauses(match.group(2))
+        statements = []
+        for clause in clauses:
+            if _MYSQL_OPTION.match(clause):
+                continue
+            index = _ADD_INDEX.match(clause)
+            if index:
+                statements.append(f'CREATE INDEX "{index.group(1)}" ON "{table}" {index.group(2)}')
+                continue
+            change = _CHANGE.match(clause) or _RENAME.match(clause)
+            if change:
+                clause = f'RENAME COLUMN "{change.group(1)}" TO "{change.group(2)}"'
+            statements.append(f'ALTER TABLE "{table}" {clause}')
+        return statements
+
+
+class ShimConnection:
+    """The subset of a pymysql connection that DatabaseOperations uses"""
+    def __init__(self, path):
+        # Implicit transactions like MySQL with autocommit off: DML opens one, commit() ends it
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        # Deterministic, so generated columns may use it
+        self._conn.create_function("CONCAT_WS", -1, concat_ws, deterministic=True)
+        self._conn.create_function("DATABASE", 0, lambda: "main")
+        self._conn.create_function("VERSION", 0, lambda: f"{sqlite3.sqlite_version}-sqlite-shim")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+
+    def cursor(self, cursor_class=None):
+        # Results are always streamed from SQLite, so an unbuffered cursor class changes nothing
+        return ShimCursor(self)
+
+    def begin(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=True):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+def connection_factory(path):
+    """Factory for DatabaseOperations.use_connection_factory()"""
+    return lambda: ShimConnection(path)
@@ -0,0 +1,156 @@
+"""Headless entry point: run transformation scripts, single operations and imports.
+
+Examples:
+    python cli.py script Rename_column.json --table student
+    python cli.py run lowercase_column --table student --param column_name=first_name
+    python cli.py run insert_batch --table student --param config=@batch-insertion.json
+    python cli.py import configs/drilling_data_ELBAKH_3.xls --table drilling
+    python cli.py ingest reports/ --workers 8
+    python cli.py operations
+
+Each command prints one JSON object with the result and timing to stdout
+and exits with status 1 on failure, so it can run from cron without a display.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+
+from core.transformation import DATABASE
+
+
+def parse_param(text):
+    """key=value; the value is read as JSON when possible, `@file.json` loads a file"""
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{text}'")
+    if value.startswith("@"):
+        with open(value[1:], "r") as f:
+            return key, json.load(f)
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Run database transformations without the GUI.")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="log to stderr (-v for INFO, -vv for every query)")
+    parser.add_argument("--slowest", type=int, default=5, metavar="N",
+                        help="include the N slowest statements in the output (default 5)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    script = commands.add_parser("script", help="run a JSON transformation script")
+    script.add_argument("file")
+    script.add_argument("--table", help="table for steps that do not name one")
+
+    run = commands.add_parser("run", aliases=["plugin"], help="run one core or plugin operation")
+    run.add_argument("operation")
+    run.add_argument("--table", required=True)
+    run.add_argument("--param", action="append", default=[], type=parse_param, metavar="KEY=VALUE",
+                     help="operation parameter; repeatable. Use KEY=@file.json to pass a JSON file")
+
+    dataset = commands.add_parser("import", help="import a CSV/Excel file into a new table")
+    dataset.add_argument("file")
+    dataset.add_argument("--table", help="table name (default: derived from the file name)")
+    dataset.add_argument("--replace", action="store_true", help="replace the table if it already exists")
+    dataset.add_argument("--chunk-size", type=int, default=20000)
+
+    documents = commands.add_parser("ingest", help="store a folder or zip of PDF/Word documents")
+    documents.add_argument("path")
+    documents.add_argument("--workers", type=int, help="extraction processes (default: CPU count)")
+    documents.add_argument("--batch-size", type=int, default=50)
+
+    commands.add_parser("operations", help="list registered operations")
+    return parser
+
+
+def run_script(args, transform_mgr):
+    return transform_mgr.load_transformations(args.file, default_table=args.table)
+
+
+def run_operation(args, transform_mgr):
+    if args.operation not in transform_mgr.operations:
+        raise ValueError(f"Unknown operation: {args.operation}")
+    result = transform_mgr.execute(args.operation, table_name=args.table, **dict(args.param))
+    if result is False:
+        raise RuntimeError(f"{args.operation} failed")
+    return result
+
+
+def run_import(args, transform_mgr):
+    from core.importer import DatasetImporter, table_name_for
+    table_name = args.table or table_name_for(args.file)
+    if DATABASE.table_exists(table_name) and not args.replace:
+        raise ValueError(f"Table '{table_name}' exists; pass --replace or choose another --table")
+    importer = DatasetImporter(DATABASE, chunk_size=args.chunk_size)
+    return importer.import_file(args.file, table_name)
+
+
+def run_ingest(args, transform_mgr):
+    # Only this command needs the document store
+    from core.bulk_ingest import BulkIngestor
+    from core.document_db import DOC_DB
+    if not DOC_DB.ensure_connected():
+        raise RuntimeError("MongoDB is not reachable")
+
+    def progress(done, total, message):
+        logging.getLogger("cli").info(message)
+    return BulkIngestor(DOC_DB, workers=args.workers, batch_size=args.batch_size).ingest(args.path, progress=progress)
+
+
+def list_operations(args, transform_mgr):
+    return {"operations": sorted(transform_mgr.operations),
+            "transactional": sorted(transform_mgr.transactional)}
+
+
+COMMANDS = {
+    "script": run_script,
+    "run": run_operation,
+    "plugin": run_operation,
+    "import": run_import,
+    "ingest": run_ingest,
+    "operations": list_operations,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+    logging.basicConfig(level=level, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from core.transform_manager import TransformManager
+    errors = []
+    transform_mgr = TransformManager(report_error=lambda title, message: errors.append(f"{title}: {message}"))
+
+    output = {"command": args.command, "ok": True}
+    started = time.perf_counter()
+    try:
+        output["result"] = COMMANDS[args.command](args, transform_mgr)
+    except Exception as e:
+        output["ok"] = False
+        errors.append(str(e))
+    output["seconds"] = round(time.perf_counter() - started, 3)
+    if errors:
+        output["errors"] = errors
+
+    stats = DATABASE.instrumentation.stats()
+    output["queries"] = {
+        "count": sum(s["count"] for s in stats.values()),
+        "seconds": round(sum(s["total_seconds"] for s in stats.values()), 6),
+        "rows": sum(s["rows"] for s in stats.values()),
+        "slowest": [event.as_dict() for event in DATABASE.instrumentation.slowest(args.slowest)],
+    }
+    DATABASE.pool.close()
+    json.dump(output, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if output["ok"] else 1
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import datetime
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "_batch_update_checkpoints"
+
+CHECKPOINT_DDL = f"""
+CREATE TABLE IF NOT EXISTS `{CHECKPOINT_TABLE}` (
+    job_id VARCHAR(64) PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    last_key TEXT NOT NULL,
+    rows_done BIGINT NOT NULL,
+    updated_at DATETIME
+)"""
+
+CHECKPOINT_SAVE = (f"REPLACE INTO `{CHECKPOINT_TABLE}` (job_id, table_name, last_key, rows_done, updated_at)"
+                   " VALUES (%s, %s, %s, %s, %s)")
+
+
+class BatchUpdater:
+    """Applies one UPDATE to a large table in primary-key ranges.
+
+    Each batch changes the rows whose key lies in (last key, batch end],
+    where the batch end is found by walking the primary key index, and
+    commits together with a checkpoint row. Locks and undo are bounded by
+    one batch, and a run that died is resumed after its last committed
+    batch when the same update is started again. With `target_seconds`
+    the batch size adapts to the server: it grows by a quarter of the
+    starting size while batches finish in time and halves when one is
+    slower. `pause` sleeps between batches to leave room for replicas and
+    other sessions.
+    """
+    def __init__(self, db, batch_size=5000, target_seconds=0.5, pause=0.0, min_batch=100, max_batch=100000):
+        self.db = db
+        self.batch_size = batch_size
+        self.target_seconds = target_seconds
+        self.pause = pause
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self._checkpoints_ready = False
+
+    @staticmethod
+    def job_id(table_name, set_clause, params=(), where=None, where_params=()):
+        """Checkpoint id of an update: the same statement and values give the same id"""
+        text = json.dumps([table_name, set_clause, list(params), where, list(where_params)], default=str)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def run(self, table_name, set_clause, params=(), where=None, where_params=(), progress=None):
+        """UPDATE `table_name` SET <set_clause> [WHERE <where>] in batches; returns rows changed.
+
+        `progress(rows_done, last_key)` is called after every committed
+        batch; raising from it stops the run with its checkpoint kept.
+        """
+        filter_sql = f" AND ({where})" if where else ""
+        return self.run_ranges(table_name, f"UPDATE `{table_name}` SET {set_clause} WHERE {{range}}{filter_sql}",
+                               params, where_params, self.job_id(table_name, set_clause, params, where, where_params),
+                               progress)
+
+    def run_ranges(self, table_name, statement, params=(), tail_params=(), job_id=None, progress=None):
+        """Run `statement` once per primary-key range of `table_name`; returns the rows it affected.
+
+        `statement` contains `{range}` where the key condition goes; its
+        parameters go between `params` and `tail_params`. Batches are sized,
+        committed and checkpointed under `job_id` as in run().
+        """
+        key_columns = self.db.get_table_columns(table_name)[1]
+        if not key_columns:
+            raise ValueError(f"Table '{table_name}' has no primary key to batch on")
+        job_id = job_id or self.job_id(table_name, statement, params, None, tail_params)
+        last_key, done = self.pending(job_id) or (None, 0)
+        if last_key is not None:
+            logger.info("Resuming batched statement on %s after key %s (%d rows done)", table_name, last_key, done)
+
+        self._ensure_checkpoints()
+        key_range = self._key_range(key_columns)
+        batch = self.batch_size
+        started = time.perf_counter()
+        while True:
+            end = self._batch_end(table_name, key_columns, last_key, batch)
+            conditions, range_params = key_range(last_key, end)
+            query = statement.replace("{range}", conditions)
+            args = list(params) + range_params + list(tail_params)
+
+            def work(conn):
+                try:
+                    with conn.cursor() as cursor:
+                        count = max(self.db._execute(cursor, query, args), 0)
+                        if end is not None:
+                            # Same transaction as the batch, so a resume never repeats or skips rows
+                            self.db._execute(cursor, CHECKPOINT_SAVE, (job_id, table_name, json.dumps(end, default=str),
+                                                                       done + count, datetime.datetime.now()),
+                                             track=False)
+                    conn.commit()
+                    return count
+                except Exception:
+                    conn.rollback()
+                    raise
+
+            batch_started = time.perf_counter()
+            done += self.db._run(work)
+            seconds = time.perf_counter() - batch_started
+            if end is None:
+                break
+            last_key = end
+            if progress:
+                progress(done, last_key)
+            batch = self._next_batch(batch, seconds)
+            if self.pause:
+                time.sleep(self.pause)
+        self.clear(job_id)
+        logger.info("Batched statement on %s: %d rows in %.1fs", table_name, done, time.perf_counter() - started)
+        return done
+
+    def pending(self, job_id):
+        """(last committed key, rows done) of an interrupted update, or None"""
+        if not self.db.table_exists(CHECKPOINT_TABLE):
+            return None
+        row = self.db._query(f"SELECT last_key, rows_done FROM `{CHECKPOINT_TABLE}` WHERE job_id = %s",
+                             (job_id,), fetch="one")
+        return (tuple(json.loads(row[0])), int(row[1])) if row else None
+
+    def clear(self, job_id):
+        """Forget an update's checkpoint (it finished, or its target was undone)"""
+        if self.db.table_exists(CHECKPOINT_TABLE):
+            self.db._execute_sql(f"DELETE FROM `{CHECKPOINT_TABLE}` WHERE job_id = %s", (job_id,))
+
+    def _ensure_checkpoints(self):
+        if not self._checkpoints_ready:
+            if not self.db.table_exists(CHECKPOINT_TABLE):
+                if self.db._execute_sql(CHECKPOINT_DDL) is False:
+                    raise self.db.last_error
+            self._checkpoints_ready = True
+
+    def _batch_end(self, table_name, key_columns, last_key, batch):
+        """Key of the `batch`-th row after `last_key`, or None if fewer rows remain"""
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        query = f"SELECT {key_list} FROM `{table_name}`"
+        params = []
+        if last_key is not None:
+            conditions, params = self._key_range(key_columns)(last_key, None)
+            query += f" WHERE {conditions}"
+        # Reads the primary key index only
+        row = self.db._query(query + f" ORDER BY {key_list} LIMIT 1 OFFSET %s", params + [batch - 1], fetch="one")
+        return tuple(row) if row else None
+
+    @staticmethod
+    def _key_range(key_columns):
+        """Function (after, until) -> (SQL condition, params) for keys in (after, until]"""
+        if len(key_columns) == 1:
+            key_expr, marks = f"`{key_columns[0]}`", "%s"
+        else:
+            key_expr = "(" + ", ".join(f"`{col}`" for col in key_columns) + ")"
+            marks = "(" + ", ".join(["%s"] * len(key_columns)) + ")"
+
+        def condition(after, until):
+            parts, params = [], []
+            if after is not None:
+                parts.append(f"{key_expr} > {marks}")
+                params.extend(after)
+            if until is not None:
+                parts.append(f"{key_expr} <= {marks}")
+                params.extend(until)
+            return " AND ".join(parts) or "1 = 1", params
+        return condition
+
+    def _next_batch(self, batch, seconds):
+        if not self.target_seconds:
+            return batch
+        if seconds > self.target_seconds:
+            return max(self.min_batch, batch // 2)
+        return min(self.max_batch, batch + max(1, self.batch_size // 4))
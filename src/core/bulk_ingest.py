@@ -0,0 +1,179 @@
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+DOCUMENT_EXTENSIONS = (".pdf", ".docx", ".doc")
+
+logger = logging.getLogger(__name__)
+
+
+class Source:
+    """One file to ingest: a path on disk or a member of a zip archive"""
+    __slots__ = ("name", "path", "member", "size")
+
+    def __init__(self, name, path, member=None, size=0):
+        self.name = name      # stored file_name, used for the duplicate check
+        self.path = path
+        self.member = member  # name inside the zip, or None
+        self.size = size
+
+
+def iter_sources(path):
+    """Yield a Source for every PDF/Word document in a directory tree or zip file"""
+    if os.path.isfile(path) and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or "__MACOSX" in info.filename or not name.lower().endswith(DOCUMENT_EXTENSIONS):
+                    continue
+                yield Source(name, path, info.filename, info.file_size)
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(DOCUMENT_EXTENSIONS):
+                    full_path = os.path.join(root, name)
+                    yield Source(name, full_path, None, os.path.getsize(full_path))
+    else:
+        raise ValueError(f"Not a directory or zip file: {path}")
+
+
+# --- worker process side ----------------------------------------------------
+
+_archives = {}  # zip path -> open ZipFile, one per worker process
+
+
+def _read(path, member):
+    if member is None:
+        with open(path, "rb") as f:
+            return f.read()
+    archive = _archives.get(path)
+    if archive is None:
+        archive = _archives[path] = zipfile.ZipFile(path)
+    return archive.read(member)
+
+
+def _process(path, member, name):
+    """Read, validate and extract one file; returns a record for insert_documents()"""
+    from file_processor import ingest_document
+    file_bytes = _read(path, member)
+    # Already one file per process; no nested page pool
+    document = ingest_document(file_bytes, name, workers=1)
+    return {
+        "file_name": name,
+        "file_type": document["mime"],
+        "content": file_bytes,
+        "extracted_text": document["text"],
+        "metadata": document["metadata"],
+        "sha256": document["sha256"],
+    }
+
+
+class BulkIngestor:
+    """Loads a folder or zip of documents into the document store.
+
+    Files whose name is already stored (or repeated within the run) are
+    skipped using the indexed file_name lookup. Extraction runs in a
+    process pool with a bounded number of files in flight, and results are
+    written with DocumentDatabase.insert_documents() in batches of
+    `batch_size` files or `batch_bytes` of content, whichever fills first.
+    Batches written before a cancellation or crash stay stored.
+    """
+    def __init__(self, doc_db, workers=None, batch_size=50, batch_bytes=32 * 1024 * 1024):
+        self.doc_db = doc_db
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+
+    def ingest(self, path, progress=None):
+        """Ingest every document under `path`; returns a summary dict.
+
+        `progress(done, total, message)` is called as files finish; raising
+        from it (e.g. JobCancelled) stops the run.
+        """
+        started = time.perf_counter()
+        sources = list(iter_sources(path))
+        summary = {"files": len(sources), "inserted": 0, "duplicates": [], "failed": [], "bytes": 0}
+        pending = self._skip_duplicates(sources, summary["duplicates"])
+        done = len(summary["duplicates"])
+        batch = []
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            queue = iter(pending)
+            running = set()
+
+            def fill():
+                # Keep a couple of files per worker queued, not the whole folder
+                while len(running) < self.workers * 2:
+                    source = next(queue, None)
+                    if source is None:
+                        return
+                    future = pool.submit(_process, source.path, source.member, source.name)
+                    future.source = source
+                    running.add(future)
+
+            try:
+                fill()
+                while running:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done += 1
+                        try:
+                            batch.append(future.result())
+                        except Exception as e:
+                            logger.warning("Skipping %s: %s", future.source.name, e)
+                            summary["failed"].append([future.source.name, str(e)])
+                    if (len(batch) >= self.batch_size
+                            or sum(len(r["content"]) for r in batch) >= self.batch_bytes):
+                        self._write(batch, summary)
+                        batch = []
+                    fill()
+                    if progress:
+                        progress(done, summary["files"], self._rate_message(done, summary, started))
+                self._write(batch, summary)
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+
+        seconds = time.perf_counter() - started
+        summary["seconds"] = round(seconds, 3)
+        summary["files_per_second"] = round(summary["inserted"] / seconds, 2) if seconds else 0.0
+        summary["mb_per_second"] = round(summary["bytes"] / 1048576 / seconds, 2) if seconds else 0.0
+        logger.info("Ingested %s of %s files from %s (%s duplicates, %s failed) in %.1fs",
+                    summary["inserted"], summary["files"], path, len(summary["duplicates"]),
+                    len(summary["failed"]), seconds)
+        return summary
+
+    def _skip_duplicates(self, sources, duplicates, lookup_size=1000):
+        pending, seen = [], set()
+        for start in range(0, len(sources), lookup_size):
+            chunk = sources[start:start + lookup_size]
+            existing = self.doc_db.existing_file_names({source.name for source in chunk})
+            for source in chunk:
+                if source.name in existing or source.name in seen:
+                    duplicates.append(source.name)
+                else:
+                    seen.add(source.name)
+                    pending.append(source)
+        return pending
+
+    def _write(self, batch, summary):
+        if not batch:
+            return
+        try:
+            self.doc_db.insert_documents(batch)
+        except Exception as e:
+            logger.error("Failed to store a batch of %s documents: %s", len(batch), e)
+            summary["failed"].extend([record["file_name"], str(e)] for record in batch)
+            return
+        summary["inserted"] += len(batch)
+        summary["bytes"] += sum(len(record["content"]) for record in batch)
+
+    @staticmethod
+    def _rate_message(done, summary, started):
+        seconds = max(time.perf_counter() - started, 1e-9)
+        return (f"{done}/{summary['files']} files, {summary['inserted'] / seconds:.1f} files/s, "
+                f"{summary['bytes'] / 1048576 / seconds:.1f} MB/s")
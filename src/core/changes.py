@@ -0,0 +1,112 @@
+import re
+
+from .schema_cache import ddl_target
+
+# Row-changing statements; "table" is the (first) table they write to
+DML_PATTERN = re.compile(
+    r"^\s*(?P<verb>INSERT|REPLACE|UPDATE|DELETE)\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|QUICK|IGNORE)\s+)*"
+    r"(?:(?:INTO|FROM)\s+)?`?(?P<table>\w+)`?",
+    re.IGNORECASE)
+
+KINDS = {"INSERT": "inserted", "REPLACE": "inserted", "UPDATE": "updated", "DELETE": "deleted"}
+
+
+def as_key(value):
+    """Primary key value(s) as a tuple"""
+    return tuple(value) if isinstance(value, (tuple, list)) else (value,)
+
+
+def normalize_key(key):
+    """Key tuple with every part as a string, so keys read from the database
+    compare equal to the same keys read back from Treeview values"""
+    return tuple(str(part) for part in as_key(key))
+
+
+class TableChanges:
+    """Rows of one table written inside a track_changes() block.
+
+    `inserted`, `updated` and `deleted` hold primary key tuples; a kind is
+    in `unknown` when some statement of that kind changed rows whose keys
+    were not determined (e.g. an UPDATE without a key condition).
+    """
+    def __init__(self, name):
+        self.name = name
+        self.schema_changed = False
+        self.inserted = set()
+        self.updated = set()
+        self.deleted = set()
+        self.unknown = set()
+        self.rows = 0  # affected rows reported by the server
+
+    def is_empty(self):
+        return not (self.schema_changed or self.inserted or self.updated or self.deleted or self.unknown)
+
+
+class ChangeSet:
+    """Tables, and where known primary keys, changed by the statements run
+    inside DatabaseOperations.track_changes() on one thread"""
+    def __init__(self):
+        self.tables = {}
+        self.unknown_ddl = False  # DDL whose table could not be named (e.g. RENAME TABLE)
+
+    def __bool__(self):
+        return self.unknown_ddl or any(not table.is_empty() for table in self.tables.values())
+
+    def table(self, name):
+        """TableChanges for `name` (created if needed)"""
+        changes = self.tables.get(name.lower())
+        if changes is None:
+            changes = self.tables[name.lower()] = TableChanges(name)
+        return changes
+
+    def get(self, name):
+        """TableChanges for `name`, or None if the table was not changed"""
+        return self.tables.get(name.lower()) if name else None
+
+    def schema_changed(self, name):
+        changes = self.get(name)
+        return self.unknown_ddl or bool(changes and changes.schema_changed)
+
+    def record(self, query, rowcount, keys=None, lastrowid=None):
+        """Account for one executed statement.
+
+        `keys` are the primary keys it touched when the caller knows them;
+        a single-row INSERT falls back to the AUTO_INCREMENT `lastrowid`.
+        Statements that affected no rows are ignored.
+        """
+        is_ddl, table_name = ddl_target(query)
+        if is_ddl:
+            if table_name:
+                self.table(table_name).schema_changed = True
+            else:
+                self.unknown_ddl = True
+            return
+        match = DML_PATTERN.match(query)
+        if not match or rowcount == 0:
+            return
+        kind = KINDS[match.group("verb").upper()]
+        if keys is None and kind == "inserted" and rowcount == 1 and lastrowid:
+            keys = [lastrowid]
+        self.add(match.group("table"), kind, keys, rowcount)
+
+    def add(self, table_name, kind, keys=None, rowcount=0):
+        """Record `kind` ("inserted", "updated" or "deleted") changes; keys=None means unknown rows"""
+        changes = self.table(table_name)
+        if keys is None:
+            changes.unknown.add(kind)
+        else:
+            getattr(changes, kind).update(as_key(key) for key in keys)
+        if rowcount and rowcount > 0:
+            changes.rows += rowcount
+
+    def merge(self, other):
+        """Fold another ChangeSet into this one (nested track_changes() blocks)"""
+        self.unknown_ddl = self.unknown_ddl or other.unknown_ddl
+        for changes in other.tables.values():
+            mine = self.table(changes.name)
+            mine.schema_changed = mine.schema_changed or changes.schema_changed
+            mine.inserted |= changes.inserted
+            mine.updated |= changes.updated
+            mine.deleted |= changes.deleted
+            mine.unknown |= changes.unknown
+            mine.rows += changes.rows
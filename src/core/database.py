@@ -1,16 +1,64 @@
 import pymysql
-from tkinter import messagebox
 import json
+import logging
+import re
 import sys
 import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pymysql.converters import escape_string
+from .batch_update import CHECKPOINT_TABLE, BatchUpdater
+from .changes import ChangeSet, as_key
+from .instrumentation import Instrumentation
+from .online_ddl import OnlineSchemaChange
+from .pool import ConnectionPool, is_connection_lost
+from .schema_cache import SchemaCache
+from .vectorized import VectorizedUpdater
+
+logger = logging.getLogger(__name__)
+
+# Above this many affected rows a tracked UPDATE is recorded without its keys
+CHANGE_KEY_LIMIT = 10000
+
+# merge_columns modes: write the values once, or a generated column computed by MySQL
+MERGE_MODES = ("materialize", "virtual", "stored")
 
 class DatabaseOperations:
     def __init__(self):
-        self.connection = None
-        self.cursor = None
         self.config = self.load_config()  # Load config
-        self.connect()
-        
+        # Connections are opened on first use; connect() warms the pool up front
+        self.pool = ConnectionPool(
+            self.open_connection,
+            min_size=self.config.get("pool_min_size", 1),
+            max_size=self.config.get("pool_max_size", 5),
+            timeout=self.config.get("pool_timeout", 10)
+        )
+        self._local = threading.local()  # per-thread connection binding
+        # Table definitions from information_schema; DDL below invalidates it
+        self.schema = SchemaCache(self, ttl=self.config.get("schema_cache_ttl", 300))
+        # Timing, row counts and fingerprints of every statement (see core/instrumentation.py)
+        self.instrumentation = Instrumentation(
+            slow_threshold=self.config.get("slow_query_seconds", 1.0),
+            slow_log_size=self.config.get("slow_log_size", 50)
+        )
+        # Whole-table UPDATEs on tables from this many rows run in primary-key batches
+        self.batch_update_threshold = self.config.get("batch_update_threshold", 100000)
+        self.batch_updater = BatchUpdater(
+            self,
+            batch_size=self.config.get("batch_update_size", 5000),
+            target_seconds=self.config.get("batch_update_target_seconds", 0.5),
+            pause=self.config.get("batch_update_pause", 0.0)
+        )
+        # Column DDL: INSTANT, then INPLACE/LOCK=NONE, then a shadow-table copy from this many rows
+        self.online_ddl = OnlineSchemaChange(self, shadow_threshold=self.config.get("online_ddl_threshold", 100000))
+        # Python (pandas/NumPy) column transforms, streamed and written back in batches
+        self.vectorized = VectorizedUpdater(
+            self,
+            batch_size=self.config.get("vectorized_batch_size", 10000),
+            queue_depth=self.config.get("vectorized_queue_depth", 2)
+        )
+
 
     def load_config(self):
         """Load database configuration from JSON file"""
@@ -25,7 +73,7 @@ class DatabaseOperations:
             with open(config_path) as f:
                 return json.load(f)
         except Exception as e:
-            messagebox.showerror("Config Error", f"Failed to load config: {str(e)}")
+            logger.error("Failed to load config: %s", e)
             return {
                 "host": "localhost",
                 "user": "root",
@@ -33,59 +81,246 @@ class DatabaseOperations:
                 "database": "university"
             }
 
+    def open_connection(self, local_infile=False):
+        """Open a new standalone connection using the loaded config.
+
+        Pooled connections never offer local files to the server; only the
+        importer's own LOAD DATA connection asks for local_infile=True.
+        """
+        isolation = self.config.get("isolation_level", "READ COMMITTED")
+        return pymysql.connect(
+            host=self.config["host"],
+            user=self.config["user"],
+            password=self.config["password"],
+            database=self.config["database"],
+            connect_timeout=5,  # Add timeout
+            local_infile=local_infile,
+            # Pooled connections live long; READ COMMITTED lets each statement
+            # see rows committed by the other connections in the pool
+            init_command=f"SET SESSION TRANSACTION ISOLATION LEVEL {isolation}"
+        )
+
+    def use_connection_factory(self, factory):
+        """Serve connections from `factory()` instead of pymysql (e.g. the benchmark SQLite shim)"""
+        old_pool = self.pool
+        self.pool = ConnectionPool(factory, min_size=old_pool.min_size, max_size=old_pool.max_size,
+                                   timeout=old_pool.timeout)
+        old_pool.close()
+        self.schema.invalidate()
+
     def connect(self):
         """Establish database connection"""
 
         try:
-            print(f"Connecting to DB: {self.config['user']}@{self.config['host']}/{self.config['database']}")
-            self.connection = pymysql.connect(
-                host=self.config["host"],
-                user=self.config["user"],
-                password=self.config["password"],
-                database=self.config["database"],
-                connect_timeout=5  # Add timeout      
-            )
-            self.cursor = self.connection.cursor()
-            print("Database connection successful!")
+            logger.info("Connecting to DB: %s@%s/%s", self.config['user'], self.config['host'], self.config['database'])
+            self.pool.warm()
+            logger.info("Database connection successful!")
         except Exception as e:
-            error_msg = f"Connection failed: {str(e)}"
-            print(error_msg)
-            messagebox.showerror("Connection Error", error_msg)
+            logger.error("Connection failed: %s", e)
             raise
-    # Core operation that all others will use
-    def _execute_sql(self, query, params=None, commit=True):
-        """Generic SQL execution with error handling"""
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a pooled connection for the calling thread.
+
+        Re-entrant: nested calls on one thread share the same connection, so
+        methods can call each other without holding several connections.
+        """
+        local = self._local
+        conn = getattr(local, "conn", None)
+        owned = conn is None
+        if owned:
+            conn = self.pool.acquire()
+            local.conn = conn
+        local.depth = getattr(local, "depth", 0) + 1
+        broken = False
         try:
-            print(" Executing Query:", query)
-            print(" Parameters:", params)
-            self.cursor.execute(query, params or ())
-            if commit:
-                self.connection.commit() # commit only if successful
+            yield conn
+        except Exception as e:
+            broken = is_connection_lost(e)
+            raise
+        finally:
+            local.depth -= 1
+            if owned:
+                local.conn = None
+                local.cursor = None
+                self.pool.release(conn, discard=broken)
+            elif broken and local.depth == 0:
+                # Thread-pinned connection: reconnect it in place
+                try:
+                    conn.ping(reconnect=True)
+                except Exception:
+                    pass
+
+    @property
+    def connection(self):
+        """Connection bound to the calling thread (pinned until release_connection)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.pool.acquire()
+            self._local.conn = conn
+        return conn
+
+    @property
+    def cursor(self):
+        """Cursor on the calling thread's connection"""
+        conn = self.connection
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None or cursor.connection is not conn:
+            cursor = conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def release_connection(self):
+        """Give a connection pinned by `connection`/`cursor` back to the pool"""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None and getattr(local, "depth", 0) == 0:
+            local.conn = None
+            local.cursor = None
+            self.pool.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Run several statements as one unit of work on the calling thread's connection.
+
+        Inside the block _execute_sql, bulk_insert and conditional_update do
+        not commit; everything commits once at the end or rolls back on error.
+        Nested blocks join the outer transaction. DDL still commits implicitly
+        in MySQL, so keep ALTER/CREATE/DROP out of transactions.
+        """
+        with self.checkout() as conn:
+            local = self._local
+            if getattr(local, "in_transaction", False):
+                yield conn
+                return
+            local.in_transaction = True
+            try:
+                conn.begin()
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                local.in_transaction = False
+
+    def in_transaction(self):
+        return getattr(self._local, "in_transaction", False)
+
+    @contextmanager
+    def track_changes(self):
+        """Collect the tables and primary keys written on the calling thread into a ChangeSet.
+
+        Every statement run through _execute() is recorded: DDL marks its
+        table's schema as changed, DML its affected keys when they are known
+        (see ChangeSet.record). Nested blocks also report to the outer one.
+        """
+        local = self._local
+        outer = getattr(local, "changes", None)
+        changes = local.changes = ChangeSet()
+        try:
+            yield changes
+        finally:
+            local.changes = outer
+            if outer is not None:
+                outer.merge(changes)
+
+    def _tracking(self):
+        """The calling thread's ChangeSet, or None outside track_changes()"""
+        return getattr(self._local, "changes", None)
+
+    def _run(self, work):
+        """Run work(connection), retrying once on a fresh connection if the server dropped it"""
+        try:
+            with self.checkout() as conn:
+                return work(conn)
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+            # Only retry at the outermost level; inside a caller's unit of work
+            # the failure has to propagate to it
+            if not is_connection_lost(e) or getattr(self._local, "depth", 0) > 0:
+                raise
+            logger.warning("Lost database connection (%s), retrying on a fresh connection", e)
+        with self.checkout() as conn:
+            return work(conn)
+
+    @property
+    def last_error(self):
+        """Exception behind the calling thread's last failed operation, or None"""
+        return getattr(self._local, "last_error", None)
+
+    @last_error.setter
+    def last_error(self, error):
+        self._local.last_error = error
+
+    def _fail(self, message):
+        """Record a failure for last_error and return False (operations report errors this way)"""
+        logger.warning(message)
+        self._local.last_error = ValueError(message)
+        return False
+
+    def _execute(self, cursor, query, params=None, many=False, keys=None, track=True):
+        """cursor.execute()/executemany() with instrumentation; returns the row count.
+
+        Inside track_changes() the statement is recorded with `keys`, the
+        primary keys it touches if the caller knows them; pass track=False
+        to record it yourself.
+        """
+        count = self.instrumentation.timed(cursor, query, params, many=many)
+        changes = self._tracking()
+        if changes is not None and track:
+            changes.record(query, count, keys, lastrowid=None if many else getattr(cursor, "lastrowid", None))
+        return count
+
+    def _query(self, query, params=None, fetch="all"):
+        """Run a read query on a pooled connection and return fetchall()/fetchone()"""
+        def work(conn):
+            with conn.cursor() as cursor:
+                self._execute(cursor, query, params)
+                return cursor.fetchall() if fetch == "all" else cursor.fetchone()
+        return self._run(work)
+
+    # Core operation that all others will use
+    def _execute_sql(self, query, params=None, commit=True, keys=None):
+        """Generic SQL execution; returns False on error and keeps it in last_error"""
+        self._local.last_error = None
+
+        def work(conn):
+            try:
+                with conn.cursor() as cursor:
+                    self._execute(cursor, query, params, keys=keys)
+                if commit and not self.in_transaction():
+                    conn.commit() # commit only if successful
+            except Exception:
+                try:
+                    conn.rollback() # roll back on failure
+                except Exception:
+                    pass
+                raise
             return True
+        try:
+            return self._run(work)
         except Exception as e:
-            print(" Error :", e)
-            self.connection.rollback() # roll back on failure
-            messagebox.showerror("Database Error", str(e))
+            # Already logged with the statement fingerprint by the instrumentation
+            self._local.last_error = e
             return False
+        finally:
+            self.schema.invalidate_for(query)  # DDL (even a failed one) may have changed the table
     def column_exists(self,table_name, column_name):
-        self.cursor.execute("SELECT COUNT(*) FROM information_schema.columns WHERE table_name = %s AND column_name = %s", (table_name, column_name))
-        return self.cursor.fetchone()[0] > 0
+        return self.schema.column(table_name, column_name) is not None
 
     def get_column_type(self, table_name, column_name):
         """Get the data type of a column in a table."""
         try:
-            query = """
-                SELECT DATA_TYPE 
-                FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_NAME = %s AND COLUMN_NAME = %s
-            """
-            self.cursor.execute(query, (table_name, column_name))
-            result = self.cursor.fetchone()
-            if not result:
+            column = self.schema.column(table_name, column_name)
+            if not column:
                 raise ValueError(f"Column '{column_name}' not found in table '{table_name}'.")
-            return result[0]  # Returns the data type (e.g., 'varchar', 'int')
+            return column["data_type"]  # Returns the data type (e.g., 'varchar', 'int')
         except Exception as e:
-            print(f"Error getting column type: {e}")
+            logger.warning("Error getting column type: %s", e)
             return None
 
     # getting metadata of tables
@@ -93,30 +328,162 @@ class DatabaseOperations:
         """Get columns, data, and primary key for a table"""
         try:
             # Get columns and primary key
-            self.cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-            columns_info = self.cursor.fetchall()
+            columns_info = self._query(f"SHOW COLUMNS FROM {table_name}")
             columns = [col[0] for col in columns_info]
             primary_key = next((col[0] for col in columns_info if col[3] == "PRI"), None)
             # Get table data
-            self.cursor.execute(f"SELECT * FROM {table_name}")
-            data = self.cursor.fetchall()
+            data = self._query(f"SELECT * FROM {table_name}")
             return columns, data, primary_key
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to get metadata: {str(e)}")
+            logger.error("Failed to get metadata: %s", e)
+            self._local.last_error = e
             return [], [], None
-        
+
+    def get_table_columns(self, table_name):
+        """Get column names and primary key column(s) without reading any rows"""
+        schema = self.schema.table(table_name)
+        if schema is None:
+            raise ValueError(f"Table '{table_name}' not found")
+        return schema.column_names, schema.key_columns
+
+    def estimate_row_count(self, table_name):
+        """Approximate row count from table statistics (no table scan)"""
+        result = self._query(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table_name,), fetch="one")
+        return int(result[0] or 0) if result else 0
+
+    def fetch_page(self, table_name, key_columns, after_key=None, limit=500, until_key=None):
+        """Fetch up to `limit` rows ordered by primary key, starting after `after_key` (keyset pagination).
+
+        With `until_key` the page ends at that key (inclusive); limit=None reads the whole range.
+        """
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        if len(key_columns) == 1:
+            key_expr, placeholders = f"`{key_columns[0]}`", "%s"
+        else:
+            key_expr, placeholders = f"({key_list})", "(" + ", ".join(["%s"] * len(key_columns)) + ")"
+        query = f"SELECT * FROM `{table_name}`"
+        conditions, params = [], []
+        if after_key is not None:
+            conditions.append(f"{key_expr} > {placeholders}")
+            params.extend(after_key)
+        if until_key is not None:
+            conditions.append(f"{key_expr} <= {placeholders}")
+            params.extend(until_key)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {key_list}"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return self._query(query, params)
+
+    def fetch_rows(self, table_name, key_columns, keys, chunk_size=500):
+        """Rows whose primary key is in `keys` (key tuples), in key order; missing keys are skipped"""
+        keys = [as_key(key) for key in keys]
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        row_marks = "%s" if len(key_columns) == 1 else "(" + ", ".join(["%s"] * len(key_columns)) + ")"
+        key_expr = f"`{key_columns[0]}`" if len(key_columns) == 1 else f"({key_list})"
+        rows = []
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            query = (f"SELECT * FROM `{table_name}` WHERE {key_expr} IN ({', '.join([row_marks] * len(chunk))})"
+                     f" ORDER BY {key_list}")
+            rows.extend(self._query(query, [part for key in chunk for part in key]))
+        return rows
+
+    def key_at_offset(self, table_name, key_columns, offset):
+        """Primary key of the row at `offset` in key order, or None past the end"""
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        # Only the key is read, so MySQL can walk the primary index instead of the rows
+        return self._query(f"SELECT {key_list} FROM `{table_name}` ORDER BY {key_list} LIMIT 1 OFFSET %s",
+                           (offset,), fetch="one")
+
+    def local_infile_enabled(self):
+        """True if the server accepts LOAD DATA LOCAL INFILE"""
+        try:
+            result = self._query("SELECT @@GLOBAL.local_infile", fetch="one")
+            return bool(result and int(result[0]))
+        except Exception as e:
+            logger.warning("Could not read local_infile setting: %s", e)
+            return False
+
+    def list_tables(self):
+        """Names of all tables in the current database"""
+        return [table[0] for table in self._query("SHOW TABLES") if table[0] != CHECKPOINT_TABLE]
+
     def table_exists(self, table_name):
         """Check if a table exists in the database."""
-        self.cursor.execute("SHOW TABLES LIKE %s", (table_name,))
-        return self.cursor.fetchone() is not None
-    
+        return self.schema.table(table_name) is not None
+
 # implementation of Insert, Update, Delete operations
     def dynamic_insert(self, table_name, values_dict):
         """Insert a new row with dynamic columns"""
         columns = ', '.join(values_dict.keys())
         placeholders = ', '.join(['%s'] * len(values_dict))
         query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-        return self._execute_sql(query, tuple(values_dict.values()))
+        return self._execute_sql(query, tuple(values_dict.values()), keys=self._row_keys(table_name, [values_dict]))
+
+    def bulk_insert(self, table_name, rows, chunk_size=1000):
+        """Insert many rows using multi-row INSERT statements.
+
+        Rows are grouped by their column set and sent `chunk_size` at a time
+        through executemany(), which pymysql rewrites into a single
+        INSERT ... VALUES (...),(...) statement. Each chunk commits once; a
+        failing chunk is rolled back and reported while the others still run.
+        Inside transaction() nothing commits and the first failing chunk
+        raises, so the caller rolls back the whole unit of work once.
+        Returns {"inserted": n, "chunks": n, "failed": [...]}.
+        """
+        groups = OrderedDict()
+        for index, row in enumerate(rows):
+            columns = tuple(sorted(row))
+            groups.setdefault(columns, []).append((index, tuple(row[col] for col in columns)))
+
+        result = {"inserted": 0, "chunks": 0, "failed": []}
+        key_columns = self.get_table_columns(table_name)[1] if self._tracking() is not None else []
+        for columns, items in groups.items():
+            column_list = ", ".join(f"`{col}`" for col in columns)
+            placeholders = ", ".join(["%s"] * len(columns))
+            query = f"INSERT INTO `{table_name}` ({column_list}) VALUES ({placeholders})"
+            # Key positions within the row tuples, when every key column is given
+            key_index = [columns.index(col) for col in key_columns] if set(key_columns) <= set(columns) else None
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                values = [row_values for _, row_values in chunk]
+                keys = [tuple(row[i] for i in key_index) for row in values] if key_columns and key_index else None
+
+                def work(conn):
+                    try:
+                        with conn.cursor() as cursor:
+                            self._execute(cursor, query, values, many=True, keys=keys)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+
+                result["chunks"] += 1
+                if self.in_transaction():
+                    # A local rollback would undo the caller's earlier statements too
+                    with self.checkout() as conn:
+                        with conn.cursor() as cursor:
+                            self._execute(cursor, query, values, many=True, keys=keys)
+                    result["inserted"] += len(chunk)
+                    continue
+                try:
+                    self._run(work)
+                    result["inserted"] += len(chunk)
+                except Exception as e:
+                    result["failed"].append({
+                        "columns": list(columns),
+                        "first_row": chunk[0][0],
+                        "rows": len(chunk),
+                        "error": str(e)
+                    })
+        logger.info("Bulk insert into %s: %d rows in %d chunks, %d failed chunks",
+                    table_name, result["inserted"], result["chunks"], len(result["failed"]))
+        return result
 
     def dynamic_update(self, table_name, pk_column, old_pk_value, updates_dict):
         """Update specific row with dynamic columns"""
@@ -124,116 +491,377 @@ class DatabaseOperations:
         query = f"UPDATE `{table_name}` SET {set_clause} WHERE {pk_column}=%s"
         #query = f"UPDATE '{table_name}' SET {set_clause} WHERE {pk_column}=%s"
         params = list(updates_dict.values()) + [old_pk_value]
-        return self._execute_sql(query, params)
+        success = self._execute_sql(query, params, keys=[old_pk_value])
+        # Setting the key column itself moves the row to a new key
+        new_pk_value = updates_dict.get(pk_column, old_pk_value)
+        changes = self._tracking()
+        if success and changes is not None and str(new_pk_value) != str(old_pk_value):
+            changes.add(table_name, "deleted", [old_pk_value])
+            changes.add(table_name, "inserted", [new_pk_value])
+        return success
 
     def dynamic_delete(self, table_name, pk_column, primary_key_value):
         """Delete a specific row"""
         query = f"DELETE FROM `{table_name}` WHERE {pk_column}=%s"
         #query = f"DELETE FROM '{table_name}' WHERE {pk_column}=%s"
-        return self._execute_sql(query, (primary_key_value,))
-    
+        return self._execute_sql(query, (primary_key_value,), keys=[primary_key_value])
+
+    def _row_keys(self, table_name, rows):
+        """Primary keys of row dicts that give every key column, for change tracking; else None"""
+        if self._tracking() is None:
+            return None
+        try:
+            key_columns = self.get_table_columns(table_name)[1]
+        except Exception:
+            return None
+        if not key_columns or not all(col in row for row in rows for col in key_columns):
+            return None
+        return [tuple(row[col] for col in key_columns) for row in rows]
+
+    def update_rows(self, table_name, set_clause, params=(), where=None, where_params=()):
+        """UPDATE `table_name` SET <set_clause> [WHERE <where>]; returns the number of rows changed.
+
+        Tables estimated at batch_update_threshold rows or more are updated
+        by BatchUpdater in committed primary-key batches, resuming an
+        interrupted run of the same update. Inside transaction(), and for
+        tables without a primary key, it runs as one statement. Raises on error.
+        """
+        if self._should_batch(table_name):
+            return self.batch_updater.run(table_name, set_clause, params, where, where_params)
+        query = f"UPDATE `{table_name}` SET {set_clause}" + (f" WHERE {where}" if where else "")
+
+        def work(conn):
+            try:
+                with conn.cursor() as cursor:
+                    count = self._execute(cursor, query, list(params) + list(where_params))
+                if not self.in_transaction():
+                    conn.commit()
+                return count
+            except Exception:
+                conn.rollback()
+                raise
+        return self._run(work)
+
+    def _should_batch(self, table_name):
+        if self.in_transaction() or not self.batch_update_threshold:
+            return False
+        if self.estimate_row_count(table_name) < self.batch_update_threshold:
+            return False
+        return bool(self.get_table_columns(table_name)[1])
+
 # implementation of rename column, remove column, add column, and merge columns
 
-    def merge_columns(self, table_name, source_columns, new_column):
+    def merge_columns(self, table_name, source_columns, new_column, mode="materialize", index=False):
+        """Merge multiple columns into a new column.
+
+        "materialize" adds a VARCHAR(255) and fills it with one (batched)
+        UPDATE. "virtual" and "stored" add a generated column over the same
+        CONCAT_WS expression, which needs no row writes (virtual) and stays
+        in step with later edits of the source columns. `index` adds a
+        secondary index on the new column.
+        """
+        if mode not in MERGE_MODES:
+            raise ValueError(f"Unknown merge mode '{mode}' (use {', '.join(MERGE_MODES)})")
         for col in source_columns:
             col_type = self.get_column_type(table_name, col)
             if not col_type or "char" not in col_type.lower():  # Covers VARCHAR, CHAR, TEXT, etc.
                 raise ValueError(f"Cannot merge non-string column: {col} (type: {col_type})")
-        print(f"[DATABASE] Merging {source_columns} into {new_column} in {table_name}")
-        """Merge multiple columns into a new column"""
-        try:
-            if self.column_exists(table_name, new_column):
-                messagebox.showerror("Error", f"Column '{new_column}' already exists! Choose a different name.")
-                return False
-            # First add the new column
-            if not self.add_column(table_name, new_column, "VARCHAR(255)"):
-                return False
-            # Then populate it with merged data
-            with self.connection.cursor() as cursor:
-                concat_expr = "CONCAT_WS(' ', " + ", ".join([f"`{col}`" for col in source_columns]) + ")"
-                query = f"UPDATE `{table_name}` SET `{new_column}` = {concat_expr}"
-            return self._execute_sql(query)
-        except Exception as e:
-            self.connection.rollback()
-            # Cleanup if merge failed
+        logger.info("Merging %s into %s in %s (%s)", source_columns, new_column, table_name, mode)
+        concat_expr = "CONCAT_WS(' ', " + ", ".join([f"`{col}`" for col in source_columns]) + ")"
+        index_clause = ("index", f"idx_{new_column}"[:64], [new_column])
+        if mode != "materialize":
             if self.column_exists(table_name, new_column):
-                self.remove_column(table_name, new_column)
-            messagebox.showerror("Merge Error", str(e))
-            return False
+                return self._fail(f"Column '{new_column}' already exists! Choose a different name.")
+            data_type = (f"VARCHAR({self._merged_length(table_name, source_columns)})"
+                         f" GENERATED ALWAYS AS ({concat_expr}) {mode.upper()}")
+            return self.online_ddl.alter(table_name, [("add", new_column, data_type)] + ([index_clause] if index else []))
+        set_clause = f"`{new_column}` = {concat_expr}"
+        job_id = self.batch_updater.job_id(table_name, set_clause)
+        # One connection for the whole merge, including the cleanup below
+        with self.checkout() as conn:
+            try:
+                if self.column_exists(table_name, new_column):
+                    # A batched merge that was interrupted resumes from its checkpoint
+                    if self.batch_updater.pending(job_id) is None:
+                        return self._fail(f"Column '{new_column}' already exists! Choose a different name.")
+                    logger.info("Resuming interrupted merge into %s.%s", table_name, new_column)
+                # First add the new column
+                elif not self.add_column(table_name, new_column, "VARCHAR(255)"):
+                    return False
+                # Then populate it with merged data
+                self.update_rows(table_name, set_clause)
+                if index and not self.online_ddl.alter(table_name, [index_clause]):
+                    raise self.last_error
+                return True
+            except Exception as e:
+                conn.rollback()
+                # Cleanup if merge failed
+                if self.column_exists(table_name, new_column):
+                    self.remove_column(table_name, new_column)
+                self.batch_updater.clear(job_id)
+                return self._fail(f"Merge failed: {e}")
+
+    def _merged_length(self, table_name, source_columns):
+        """VARCHAR length that fits the source columns joined by single spaces"""
+        length = len(source_columns) - 1
+        for col in source_columns:
+            match = re.search(r"\((\d+)\)", self.schema.column(table_name, col)["column_type"])
+            if not match:
+                return 255
+            length += int(match.group(1))
+        return min(length, 16383)  # longest VARCHAR in utf8mb4
 
     def add_column(self, table_name, column_name, data_type="VARCHAR(255)"):
         """Add a new column to a table"""
-        try:
-            if self.column_exists(table_name, column_name):
-               messagebox.showerror("Error", f"Column '{column_name}' already exists!")
-               return False
-            query = f"ALTER TABLE `{table_name}` ADD COLUMN `{column_name}` {data_type}"
-            return self._execute_sql(query)
-        except Exception as e:
-            self.connection.rollback()
-            messagebox.showerror("Error", f"Add column failed: {str(e)}")
-            return False
+        with self.checkout() as conn:
+            try:
+                if self.column_exists(table_name, column_name):
+                   return self._fail(f"Column '{column_name}' already exists!")
+                return self.online_ddl.alter(table_name, [("add", column_name, data_type)])
+            except Exception as e:
+                conn.rollback()
+                return self._fail(f"Add column failed: {e}")
 
     def rename_column(self, table_name, old_col_name, new_col_name):
         """Rename an existing column"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(f"SHOW COLUMNS FROM `{table_name}` WHERE Field = %s", (old_col_name,))
-            col_info = cursor.fetchone()
-            print(col_info)
+            col_info = self.schema.column(table_name, old_col_name)
             if not col_info:
                 raise ValueError("Column not found")
-            # Build and execute rename query
-            query = (f"""ALTER TABLE `{table_name}` CHANGE COLUMN `{old_col_name}`
-                      `{new_col_name}` {col_info[1]} 
-                       {'NOT NULL' if col_info[2] == 'NO' else ''} 
-                       {col_info[4] or ''}""")
-            # Clean the query by removing extra whitespace
-            query = " ".join(query.split())
-            return self._execute_sql(query)
+            # RENAME COLUMN on MySQL 8+, else CHANGE COLUMN with the current definition
+            return self.online_ddl.alter(table_name, [("rename", old_col_name, new_col_name)])
         except Exception as e:
-            messagebox.showerror("Rename Error", str(e))
-            return False
+            return self._fail(f"Rename failed: {e}")
+
+    def alter_table(self, table_name, clauses):
+        """Apply several column changes in one ALTER TABLE statement (one table rebuild).
+
+        `clauses` are ("add", column, data_type), ("rename", old, new) or
+        ("drop", column) tuples. The statement succeeds or fails as a whole
+        and uses the cheapest online algorithm (see OnlineSchemaChange).
+        """
+        return self.online_ddl.alter(table_name, clauses)
+
+    @staticmethod
+    def column_definition(col_info):
+        """Column definition (type, nullability, default, extras) as CHANGE COLUMN expects it"""
+        parts = [col_info["column_type"]]
+        extra = col_info["extra"]
+        if col_info["generation_expression"]:
+            kind = "STORED" if "STORED" in extra.upper() else "VIRTUAL"
+            parts.append(f"GENERATED ALWAYS AS ({col_info['generation_expression']}) {kind}")
+            return " ".join(parts)
+        if not col_info["nullable"]:
+            parts.append("NOT NULL")
+        default = col_info["default"]
+        if default is not None:
+            if "DEFAULT_GENERATED" not in extra.upper():
+                parts.append(f"DEFAULT '{escape_string(str(default))}'")
+            elif default.upper().startswith("CURRENT_TIMESTAMP"):
+                parts.append(f"DEFAULT {default}")
+            else:
+                parts.append(f"DEFAULT ({default})")  # expression default (MySQL 8.0.13+)
+        # information_schema marks expression defaults in EXTRA; it is not valid DDL
+        extra = re.sub(r"\bDEFAULT_GENERATED\b", "", extra, flags=re.IGNORECASE).strip()
+        if extra:
+            parts.append(extra)
+        return " ".join(parts)
 
     def remove_column(self, table_name, column_name):
         """Remove a column from a table"""
         # Check for foreign key constraints first
-        self.cursor.execute ("SELECT COUNT(*) " \
-        "FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_NAME = %s " \
-        "AND COLUMN_NAME = %s " \
-        "AND REFERENCED_TABLE_NAME IS NOT NULL",  (table_name, column_name))
-        result= self.cursor.fetchone()
-        if result and result[0] > 0:
-            messagebox.showerror("Error", "Column is referenced in foreign key constraints!")
-            return False
+        col_info = self.schema.column(table_name, column_name)
+        if col_info and col_info["has_fk"]:
+            return self._fail("Column is referenced in foreign key constraints!")
 
-        query = f"ALTER TABLE `{table_name}` DROP COLUMN `{column_name}`"
-        return self._execute_sql(query)
+        return self.online_ddl.alter(table_name, [("drop", column_name)])
 # Conditional update
     def conditional_update(self, table_name, conditions, updates):
         """Update rows based on conditions"""
+        if not conditions or not updates:
+            raise ValueError("Both conditions and updates must be provided")
+        set_parts = [] # Update fields
+        where_parts = [] # Condition fields
+        for col in updates:
+            set_parts.append(f"`{col}` = %s")
+        for col in conditions:
+            where_parts.append(f"`{col}` = %s")
+        query = (f"UPDATE `{table_name}` " f"SET {', '.join(set_parts)} "
+                  f"WHERE {' AND '.join(where_parts)}")
+        params = list(updates.values()) + list(conditions.values())
+        if self._should_batch(table_name):
+            return self.batch_updater.run(table_name, ", ".join(set_parts), list(updates.values()),
+                                          " AND ".join(where_parts), list(conditions.values()))
+        changes = self._tracking()
+
+        def work(conn):
+            try:
+                with conn.cursor() as cursor:
+                    self._execute(cursor, query, params, track=False)
+                    count = cursor.rowcount
+                    if changes is not None and count:
+                        changes.add(table_name, "updated", self._updated_keys(cursor, table_name, conditions,
+                                                                              updates, count), count)
+                    if not self.in_transaction():
+                        conn.commit()
+                    return count
+            except Exception:
+                conn.rollback()
+                raise
+        return self._run(work)
+
+    def _updated_keys(self, cursor, table_name, conditions, updates, count):
+        """Keys of the rows a conditional UPDATE changed, found by a keyed SELECT on their new values.
+
+        Runs on the UPDATE's own connection and transaction. Returns None (unknown rows)
+        when the table has no primary key or more than CHANGE_KEY_LIMIT rows changed.
+        """
+        schema = self.schema.table(table_name)
+        key_columns = schema.key_columns if schema else []
+        if not key_columns or count > CHANGE_KEY_LIMIT:
+            return None
+        # Updated columns now hold their new values; the other conditions still hold
+        after = dict(conditions)
+        after.update(updates)
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        where = " AND ".join(f"`{col}` = %s" for col in after)
+        self._execute(cursor, f"SELECT {key_list} FROM `{table_name}` WHERE {where} LIMIT %s",
+                      list(after.values()) + [CHANGE_KEY_LIMIT + 1])
+        rows = cursor.fetchall()
+        return None if len(rows) > CHANGE_KEY_LIMIT else [tuple(row) for row in rows]
+
+
+class PagedTableSource:
+    """Read-only view of a table paged by primary key (keyset pagination).
+
+    Pages are fetched on demand and kept in a small LRU cache, so only the
+    rows around the current scroll position are held in memory. Background
+    prefetches draw their own connection from the pool.
+    """
+    def __init__(self, db, table_name, page_size=500, max_cached_pages=8):
+        self.db = db
+        self.table_name = table_name
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self.columns, self.key_columns = db.get_table_columns(table_name)
+        self.primary_key = self.key_columns[0] if self.key_columns else None
+        self._key_index = [self.columns.index(col) for col in self.key_columns]
+        self._page_starts = {0: None}  # page index -> key the page starts after
+        self._last_page = None         # index of the final page once it is known
+        self._pages = OrderedDict()
+        self._inflight = {}            # page index -> Event set when its fetch ends
+        self._lock = threading.Lock()
+
+    def row_key(self, row):
+        """Primary key tuple of a row returned by this source"""
+        return tuple(row[i] for i in self._key_index)
+
+    def estimated_rows(self):
+        return self.db.estimate_row_count(self.table_name)
+
+    def get_page(self, index):
+        """Rows of page `index`; an empty list past the end of the table"""
+        while True:
+            with self._lock:
+                if index in self._pages:
+                    self._pages.move_to_end(index)
+                    return self._pages[index]
+                if index < 0 or (self._last_page is not None and index > self._last_page):
+                    return []
+                pending = self._inflight.get(index)
+                if pending is None:
+                    pending = self._inflight[index] = threading.Event()
+                    break
+            # Another thread (usually a prefetch) is already loading this page
+            pending.wait()
         try:
-            if not conditions or not updates:
-                raise ValueError("Both conditions and updates must be provided")
-            set_parts = [] # Update fields
-            where_parts = [] # Condition fields
-            for col in updates:
-                set_parts.append(f"`{col}` = %s")
-            for col in conditions:
-                where_parts.append(f"`{col}` = %s")     
-            query = (f"UPDATE `{table_name}` " f"SET {', '.join(set_parts)} "
-                      f"WHERE {' AND '.join(where_parts)}")
-            params = list(updates.values()) + list(conditions.values())
-            
-            self.cursor.execute(query, params)
-            self.connection.commit()
-            return self.cursor.rowcount
-        except Exception as e:
-            self.connection.rollback()
-            raise e
-  
-DATABASE = DatabaseOperations()   
+            rows = self._fetch(index)
+            with self._lock:
+                self._pages[index] = rows
+                while len(self._pages) > self.max_cached_pages:
+                    self._pages.popitem(last=False)
+            return rows
+        finally:
+            with self._lock:
+                self._inflight.pop(index, None)
+            pending.set()
+
+    def cached_page(self, index):
+        """Rows of page `index` if they are cached (or known to be empty), else None"""
+        with self._lock:
+            if index in self._pages:
+                self._pages.move_to_end(index)
+                return self._pages[index]
+            if index < 0 or (self._last_page is not None and index > self._last_page):
+                return []
+        return None
+
+    def prefetch(self, index):
+        """Load page `index` into the cache on a background thread"""
+        with self._lock:
+            if index < 0 or index in self._pages or index in self._inflight:
+                return
+            if self._last_page is not None and index > self._last_page:
+                return
+        threading.Thread(target=self._prefetch_worker, args=(index,), daemon=True).start()
+
+    def invalidate(self):
+        """Drop cached pages so the next read sees fresh data"""
+        with self._lock:
+            self._pages.clear()
+            self._page_starts = {0: None}
+            self._last_page = None
 
-    
+    def refresh(self):
+        """Drop cached rows but keep the page boundaries already found.
+
+        Pages between known boundaries are re-read by key range, so rows
+        shown for them stay aligned after rows were inserted or deleted.
+        """
+        with self._lock:
+            self._pages.clear()
+            self._last_page = None
+
+    @property
+    def last_page(self):
+        """Index of the final page once it has been read, else None"""
+        with self._lock:
+            return self._last_page
+
+    def close(self):
+        with self._lock:
+            self._pages.clear()
+
+    def _prefetch_worker(self, index):
+        try:
+            self.get_page(index)
+        except Exception as e:
+            logger.warning("Prefetch of page %d from %s failed: %s", index, self.table_name, e)
 
-        
\ No newline at end of file
+    def _fetch(self, index):
+        with self._lock:
+            start = self._page_starts.get(index, False)
+        if start is False:
+            # Jumping ahead: locate the key just before this page by walking the index only
+            start = self.db.key_at_offset(self.table_name, self.key_columns, index * self.page_size - 1)
+            if start is None:
+                with self._lock:
+                    self._last_page = index - 1 if self._last_page is None else min(self._last_page, index - 1)
+                return []
+            start = tuple(start)
+            with self._lock:
+                self._page_starts[index] = start
+        with self._lock:
+            end = self._page_starts.get(index + 1)
+        if end is not None:
+            # Boundary already known: read exactly the key range so the page stays aligned
+            return list(self.db.fetch_page(self.table_name, self.key_columns,
+                                           after_key=start, limit=None, until_key=end))
+        rows = list(self.db.fetch_page(self.table_name, self.key_columns,
+                                       after_key=start, limit=self.page_size))
+        with self._lock:
+            if len(rows) == self.page_size:
+                self._page_starts[index + 1] = self.row_key(rows[-1])
+            else:
+                self._last_page = index
+        return rows
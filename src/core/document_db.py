@@ -1,20 +1,151 @@
 import os
 import json
 import sys
-from pymongo import MongoClient
-from gridfs import GridFS
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
 from bson import ObjectId
 import datetime
 from bson.errors import InvalidId
+from core.fulltext import InvertedIndex, Query, highlight_spans, make_snippet
+from core.local_store import LocalDocumentStore
+
+logger = logging.getLogger(__name__)
+
+# GridFS default; files written by insert_documents() are readable with fs.get()
+GRIDFS_CHUNK_SIZE = 255 * 1024
+
+# Orders for get_documents_page(); each is backed by a (field, _id) index
+DOCUMENT_SORTS = {
+    "name": ("file_name", 1),
+    "newest": ("created_at", -1),
+    "oldest": ("created_at", 1),
+}
+
+
+class ExtractionCache:
+    """Text and metadata extracted from file contents, keyed by SHA-256.
+
+    Implements the cache protocol of file_processor (get/put). A small
+    in-memory LRU sits in front of the `extraction_cache` collection; without
+    MongoDB only the in-memory part is used.
+    """
+    def __init__(self, doc_db, size=64):
+        self.doc_db = doc_db
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sha256):
+        with self._lock:
+            entry = self._entries.get(sha256)
+            if entry is not None:
+                self._entries.move_to_end(sha256)
+                return dict(entry)
+        if self.doc_db.client:
+            try:
+                entry = self.doc_db.db.extraction_cache.find_one({"_id": sha256}, {"_id": 0})
+            except Exception as e:
+                logger.warning("Extraction cache lookup failed: %s", e)
+                entry = None
+            if entry:
+                self._remember(sha256, entry)
+                return dict(entry)
+        return None
+
+    def put(self, sha256, fields):
+        with self._lock:
+            entry = dict(self._entries.get(sha256) or {})
+        entry.update(fields)
+        self._remember(sha256, entry)
+        if self.doc_db.client:
+            try:
+                self.doc_db.db.extraction_cache.update_one(
+                    {"_id": sha256},
+                    {"$set": dict(fields, updated_at=datetime.datetime.utcnow())},
+                    upsert=True)
+            except Exception as e:
+                logger.warning("Extraction cache write failed: %s", e)
+
+    def _remember(self, sha256, entry):
+        with self._lock:
+            self._entries[sha256] = entry
+            self._entries.move_to_end(sha256)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+class SearchCache:
+    """Recent search results with LRU eviction; any insert or delete empties it.
+
+    Results are only stored if nothing changed while the search ran, so a
+    search racing an upload cannot cache results missing the new document.
+    """
+    def __init__(self, size=64):
+        self.size = size
+        self.version = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            results = self._results.get(key)
+            if results is not None:
+                self._results.move_to_end(key)
+            return results
+
+    def put(self, key, version, results):
+        with self._lock:
+            if version != self.version:
+                return
+            self._results[key] = results
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._results.clear()
+
+
+def _changes_documents(method):
+    """Invalidate cached search results after `method` ran"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.search_cache.invalidate()
+    return wrapper
+
+
+def is_local_id(doc_id):
+    """Ids of the local fallback store are small integers; MongoDB ids are 24 hex digits"""
+    doc_id = str(doc_id)
+    return doc_id.isdigit() and len(doc_id) < 24
+
 
 class DocumentDatabase:
-    def __init__(self):
+    def __init__(self, connect=True, local_path=None):
         self.config = self.load_config()
         self.client = None
         self.db = None
         self.fs = None
-        self.fallback_storage = []
-        self.connect()
+        # Documents stored while MongoDB is unreachable; synced once it is back
+        self.local = LocalDocumentStore(local_path or self.config.get("fallback_path"))
+        self.fallback_index = InvertedIndex()
+        self._fallback_indexed = False
+        self._sync_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._last_connect_attempt = None  # monotonic time; None until the first attempt
+        self._chunk_index_ready = False
+        self._text_index_ready = False
+        self.search_cache = SearchCache()
+        self.extraction_cache = ExtractionCache(self)
+        if connect:
+            self.connect()
         
     def load_config(self):
         """Load MongoDB configuration from JSON file"""
@@ -28,13 +159,11 @@ class DocumentDatabase:
             
             with open(config_path) as f:
                 config = json.load(f)
-                print("Loaded MongoDB config:")
-                print(f"  Host: {config.get('host', 'localhost')}")
-                print(f"  Port: {config.get('port', 27017)}")
-                print(f"  Database: {config.get('database', 'document_db')}")
+                logger.info("Loaded MongoDB config: host %s, port %s, database %s", config.get('host', 'localhost'),
+                            config.get('port', 27017), config.get('database', 'document_db'))
                 return config
         except Exception as e:
-            print(f"Failed to load MongoDB config: {str(e)}")
+            logger.error("Failed to load MongoDB config: %s", e)
             return {
                 "host": "localhost",
                 "port": 27017,
@@ -43,46 +172,159 @@ class DocumentDatabase:
             
     def connect(self):
         """Establish MongoDB connection"""
+        self._last_connect_attempt = time.monotonic()
+        self._text_index_ready = self._chunk_index_ready = False
         try:
+            # pymongo is only loaded when a connection is wanted
+            from pymongo import MongoClient
+            from gridfs import GridFS
+
             host = self.config.get("host", "localhost")
             port = self.config.get("port", 27017)
-            self.client = MongoClient(host, port)
-            print(f"Connecting to MongoDB at {host}:{port}...")
+            timeout_ms = self.config.get("server_selection_timeout_ms", 5000)
+            self.client = MongoClient(host, port, serverSelectionTimeoutMS=timeout_ms)
+            logger.info("Connecting to MongoDB at %s:%s", host, port)
             
             # Test connection
             self.client.server_info()
-            print("MongoDB connection successful!")
+            logger.info("MongoDB connection successful!")
             
             # Get database
             db_name = self.config.get("database", "document_db")
             self.db = self.client[db_name]
             self.fs = GridFS(self.db)
-            print(f"Using database: {db_name}")
+            logger.info("Using database: %s", db_name)
+
+            # Duplicate checks and the paged list by name; the same index in reverse
+            # serves descending scans, so one per sort field is enough
+            self.db.documents.create_index([("file_name", 1), ("_id", 1)])
+            self.db.documents.create_index([("created_at", -1), ("_id", -1)])
+            # Identical contents share one GridFS file; deletes check who else uses it
+            self.db.fs.files.create_index("sha256")
+            self.db.documents.create_index("file_id")
 
             # Create text index if collection exists
             if "documents" in self.db.list_collection_names():
-                if "extracted_text_text" not in self.db.documents.index_information():
-                    self.db.documents.create_index([("extracted_text", "text")])
-                    print("Created text index for search")
+                self._ensure_text_index()
+
+            if self.local.count():
+                threading.Thread(target=self.sync_local, name="Sync local documents", daemon=True).start()
             
         except Exception as e:
-            print(f"MongoDB connection failed: {str(e)}")
-            print("Using in-memory fallback storage for documents")
+            logger.warning("MongoDB connection failed: %s; using local fallback storage for documents", e)
+            self.client = None  # so the methods below go straight to the fallback storage
     
-    def insert_document(self, file_name, file_type, content, extracted_text, metadata):
-        """Insert a new document with metadata"""
+    def _find_blob(self, sha256):
+        found = self.db.fs.files.find_one({"sha256": sha256}, {"_id": 1})
+        return found["_id"] if found else None
+
+    def ensure_connected(self):
+        """Connect unless that was attempted already; returns whether MongoDB is up.
+
+        Callers arriving while another thread connects wait for its result.
+        """
+        with self._connect_lock:
+            if self._last_connect_attempt is None:
+                self.connect()
+        return self.client is not None
+
+    def reconnect(self, min_interval=60):
+        """Like ensure_connected(), and retry if MongoDB was down `min_interval` seconds ago"""
+        with self._connect_lock:
+            if self._last_connect_attempt is None or (
+                    self.client is None and time.monotonic() - self._last_connect_attempt >= min_interval):
+                self.connect()
+        return self.client is not None
+
+    def _resolve(self, doc_id):
+        """MongoDB id for a local id whose document has been synced, else doc_id"""
+        doc_id = str(doc_id)
+        if is_local_id(doc_id):
+            return self.local.remote_id(doc_id) or doc_id
+        return doc_id
+
+    def _ensure_fallback_index(self):
+        # Built on first offline search rather than at startup
+        if not self._fallback_indexed:
+            self.reindex_fallback()
+
+    def reindex_fallback(self):
+        """Rebuild the search index over the local fallback store"""
+        self.fallback_index.clear()
+        for doc_id, text in self.local.texts():
+            self.fallback_index.add(doc_id, text)
+        self._fallback_indexed = True
+
+    def _ensure_text_index(self):
+        # Checked once per connection instead of on every search
+        if not self._text_index_ready:
+            if "extracted_text_text" not in self.db.documents.index_information():
+                self.db.documents.create_index([("extracted_text", "text")])
+                logger.info("Created text index for search")
+            self._text_index_ready = True
+
+    @_changes_documents
+    def sync_local(self, batch_size=20):
+        """Copy documents stored locally while offline to MongoDB; returns how many moved.
+
+        Each batch is written with insert_documents() and then removed from
+        the local store, which keeps a map from the old local ids to the new ones.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return 0  # another thread is already syncing
+        moved = 0
+        try:
+            while self.client:
+                batch = self.local.pending(batch_size)
+                if not batch:
+                    break
+                remote_ids = self.insert_documents([{
+                    "file_name": doc["file_name"],
+                    "file_type": doc["file_type"],
+                    "content": doc["content"],
+                    "extracted_text": doc["extracted_text"],
+                    "metadata": doc["metadata"],
+                    "sha256": doc["sha256"],
+                } for doc in batch])
+                self.local.mark_synced(zip([doc["id"] for doc in batch], remote_ids))
+                for doc in batch:
+                    self.fallback_index.remove(doc["id"])
+                moved += len(batch)
+            if moved:
+                logger.info("Synced %d locally stored documents to MongoDB", moved)
+        except Exception as e:
+            logger.warning("Syncing local documents failed: %s", e)
+        finally:
+            self._sync_lock.release()
+        return moved
+
+    @_changes_documents
+    def insert_document(self, file_name, file_type, content, extracted_text, metadata, sha256=None):
+        """Insert a new document with metadata.
+
+        The file content is stored once per SHA-256: uploading bytes that are
+        already stored only adds a document pointing at the existing GridFS file.
+        """
+        sha256 = sha256 or hashlib.sha256(content).hexdigest()
         file_id = None
+        created = False
+        self.reconnect()
         try:
             if self.client:
-                # Store file content in GridFS
-                file_id = self.fs.put(
-                    content,
-                    filename=file_name,
-                    content_type=file_type,
-                    metadata=metadata
-                )
+                file_id = self._find_blob(sha256)
+                if file_id is None:
+                    # Store file content in GridFS
+                    file_id = self.fs.put(
+                        content,
+                        filename=file_name,
+                        content_type=file_type,
+                        metadata=metadata,
+                        sha256=sha256
+                    )
+                    created = True
                 document = {
                     "file_id": file_id,
+                    "sha256": sha256,
                     "file_name": file_name,
                     "file_type": file_type,
                     "extracted_text": extracted_text,
@@ -93,44 +335,125 @@ class DocumentDatabase:
                 return str(result.inserted_id)
             
         except Exception as e:
-            print(f"Error inserting document: {str(e)}")
+            logger.error("Error inserting document: %s", e)
             # Cleanup orphaned GridFS file if created
-            if file_id:
+            if created:
                 try:
                     self.fs.delete(file_id)
-                    print(f"Deleted orphaned GridFS file: {file_id}")
+                    logger.info("Deleted orphaned GridFS file: %s", file_id)
                 except Exception as delete_err:
-                    print(f"Failed to delete orphaned file: {str(delete_err)}")
+                    logger.warning("Failed to delete orphaned file: %s", delete_err)
         
-        # Fallback to in-memory storage
-        print("Using in-memory fallback storage")
-        doc_id = len(self.fallback_storage)
-        self.fallback_storage.append({
-            "id": str(doc_id),
-            "file_name": file_name,
-            "file_type": file_type,
-            "content": content,
-            "extracted_text": extracted_text,
-            "metadata": metadata,
-            "created_at": datetime.datetime.utcnow()  # Add timestamp for consistency
-        })
-        return str(doc_id)
+        # Fallback to the local store
+        logger.info("Using local fallback storage")
+        doc_id = self.local.insert(file_name, file_type, content, extracted_text, metadata, sha256)
+        if self._fallback_indexed:
+            self.fallback_index.add(doc_id, extracted_text)
+        return doc_id
             
     
+    @_changes_documents
+    def insert_documents(self, records):
+        """Insert many documents with a few round trips; returns their ids.
+
+        `records` are dicts with file_name, file_type, content, extracted_text,
+        metadata and optionally sha256. File contents are written as GridFS
+        files and chunks with insert_many instead of one fs.put() per file,
+        skipping contents that are already stored or repeated in the batch;
+        if a batch fails, whatever it wrote is removed again and the error is raised.
+        """
+        if not records:
+            return []
+        hashes = [record.get("sha256") or hashlib.sha256(record["content"]).hexdigest()
+                  for record in records]
+        if not self.client:
+            return [self.insert_document(r["file_name"], r["file_type"], r["content"],
+                                         r["extracted_text"], r["metadata"], sha256=sha256)
+                    for r, sha256 in zip(records, hashes)]
+
+        now = datetime.datetime.utcnow()
+        blobs = {f["sha256"]: f["_id"] for f in
+                 self.db.fs.files.find({"sha256": {"$in": list(set(hashes))}}, {"sha256": 1})}
+        files, chunks, documents = [], [], []
+        for record, sha256 in zip(records, hashes):
+            file_id = blobs.get(sha256)
+            if file_id is None:
+                file_id = blobs[sha256] = ObjectId()
+                content = record["content"]
+                files.append({
+                    "_id": file_id,
+                    "length": len(content),
+                    "chunkSize": GRIDFS_CHUNK_SIZE,
+                    "uploadDate": now,
+                    "filename": record["file_name"],
+                    "contentType": record["file_type"],
+                    "metadata": record["metadata"],
+                    "sha256": sha256,
+                })
+                for n, start in enumerate(range(0, len(content), GRIDFS_CHUNK_SIZE)):
+                    chunks.append({"files_id": file_id, "n": n,
+                                   "data": content[start:start + GRIDFS_CHUNK_SIZE]})
+            documents.append({
+                "file_id": file_id,
+                "sha256": sha256,
+                "file_name": record["file_name"],
+                "file_type": record["file_type"],
+                "extracted_text": record["extracted_text"],
+                "metadata": record["metadata"],
+                "created_at": now,
+            })
+
+        file_ids = [f["_id"] for f in files]  # only blobs this batch created
+        try:
+            if not self._chunk_index_ready:
+                self.db.fs.chunks.create_index([("files_id", 1), ("n", 1)], unique=True)
+                self._chunk_index_ready = True
+            # Chunks before files, so a visible GridFS file is always complete
+            if chunks:
+                self.db.fs.chunks.insert_many(chunks, ordered=False)
+            if files:
+                self.db.fs.files.insert_many(files, ordered=False)
+            result = self.db.documents.insert_many(documents, ordered=False)
+            return [str(doc_id) for doc_id in result.inserted_ids]
+        except Exception:
+            # insert_many assigns _id to each document before sending it
+            self.db.documents.delete_many({"_id": {"$in": [d["_id"] for d in documents if "_id" in d]}})
+            self.db.fs.files.delete_many({"_id": {"$in": file_ids}})
+            self.db.fs.chunks.delete_many({"files_id": {"$in": file_ids}})
+            raise
+
+    def document_exists(self, file_name):
+        """Whether a document with this file name is stored (uses the file_name index)"""
+        return file_name in self.existing_file_names([file_name])
+
+    def existing_file_names(self, file_names):
+        """The subset of `file_names` that are already stored"""
+        file_names = list(file_names)
+        if self.client:
+            try:
+                found = self.db.documents.find({"file_name": {"$in": file_names}},
+                                               {"file_name": 1, "_id": 0})
+                # Documents stored offline count too until they are synced
+                return {doc["file_name"] for doc in found} | self.local.file_names(file_names)
+            except Exception as e:
+                logger.warning("Error checking file names: %s", e)
+        return self.local.file_names(file_names)
+
     def get_document_text(self, doc_id):
         """Get extracted text from a document"""
+        doc_id = self._resolve(doc_id)
         try:
-            if self.client:
+            if self.client and not is_local_id(doc_id):
                 document = self.db.documents.find_one({"_id": ObjectId(doc_id)})
                 return document["extracted_text"] if document else None
         except (InvalidId, Exception):
             pass
 
-        # Fallback to in-memory storage
+        # Fallback to the local store
         try:
-            doc = self.fallback_storage[int(doc_id)]
-            return doc["extracted_text"]
-        except (IndexError, ValueError):
+            doc = self.local.get(doc_id)
+            return doc["extracted_text"] if doc else ""
+        except ValueError:
             return ""
         
     def search_documents(self, search_term):
@@ -139,8 +462,7 @@ class DocumentDatabase:
         if self.client:
             try:
                 # Create text index if it doesn't exist
-                if "extracted_text_text" not in self.db.documents.index_information():
-                    self.db.documents.create_index([("extracted_text", "text")])
+                self._ensure_text_index()
                 
                 results = self.db.documents.find(
                     {"$text": {"$search": search_term}},
@@ -148,38 +470,161 @@ class DocumentDatabase:
                 ).sort([("score", {"$meta": "textScore"})])
                 return [(str(doc["_id"]), doc["file_name"]) for doc in results]
             except Exception as e:
-                print(f"MongoDB search error: {str(e)}")
+                logger.error("MongoDB search error: %s", e)
         
-        # Fallback to simple in-memory search
-        for doc in self.fallback_storage:
-            if search_term.lower() in doc["extracted_text"].lower():
-                results.append((doc["id"], doc["file_name"]))
-        return results
+        # Fallback to the local index, ranked like textScore
+        self._ensure_fallback_index()
+        names = dict((doc_id, file_name) for doc_id, file_name, _ in self.local.list())
+        return [(doc_id, names[doc_id]) for doc_id, score in self.fallback_index.search(search_term)
+                if doc_id in names]
     
+    def search_snippets(self, search_term, limit=20, width=200, max_time_ms=2000):
+        """Ranked matches with a `width`-character snippet around the first hit.
+
+        Returns dicts with id, file_name, score, snippet and highlights
+        ((start, end) offsets of matching words in the snippet). In MongoDB
+        the snippet is cut by the aggregation, so only `width` characters of
+        each document's text are sent; queries give up after `max_time_ms`.
+        Recent results are served from search_cache.
+        """
+        key = (" ".join(search_term.lower().split()), limit, width)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.search_cache.version
+        query = Query(search_term)
+        if query.is_empty():
+            return []
+
+        results = None
+        if self.client:
+            try:
+                self._ensure_text_index()
+                pipeline = [
+                    {"$match": {"$text": {"$search": search_term}}},
+                    {"$sort": {"score": {"$meta": "textScore"}}},
+                    {"$limit": limit},
+                    {"$project": {
+                        "file_name": 1,
+                        "score": {"$meta": "textScore"},
+                        "snippet": {"$let": {
+                            "vars": {"position": {"$indexOfCP": [{"$toLower": "$extracted_text"},
+                                                                 query.needle or ""]}},
+                            # Same window as fulltext.make_snippet()
+                            "in": {"$substrCP": ["$extracted_text",
+                                                 {"$max": [0, {"$subtract": ["$$position", width // 4]}]},
+                                                 width]},
+                        }},
+                    }},
+                ]
+                found = self.db.documents.aggregate(pipeline, maxTimeMS=max_time_ms)
+                results = [{"id": str(doc["_id"]), "file_name": doc["file_name"], "score": doc["score"],
+                            "snippet": doc.get("snippet") or ""} for doc in found]
+            except Exception as e:
+                logger.error("MongoDB search error: %s", e)
+
+        if results is None:
+            # Fallback to the local index
+            self._ensure_fallback_index()
+            results = []
+            for doc_id, score in self.fallback_index.search(query, limit=limit):
+                doc = self.local.get(doc_id)
+                if doc is not None:
+                    results.append({"id": doc_id, "file_name": doc["file_name"], "score": score,
+                                    "snippet": make_snippet(doc["extracted_text"], query, width)})
+
+        for result in results:
+            result["highlights"] = highlight_spans(result["snippet"], query)
+        self.search_cache.put(key, version, results)
+        return results
+
     def get_all_documents(self):
         """Get all documents metadata"""
+        self.reconnect()
+        documents = []
         try:
-            documents = self.db.documents.find({}, {"file_name": 1, "file_type": 1})
-            return [(str(doc["_id"]), doc["file_name"], doc["file_type"]) for doc in documents]
+            if self.client:
+                found = self.db.documents.find({}, {"file_name": 1, "file_type": 1})
+                documents = [(str(doc["_id"]), doc["file_name"], doc["file_type"]) for doc in found]
         except Exception as e:
-            print(f"Error getting documents: {str(e)}")
-            return []
+            logger.error("Error getting documents: %s", e)
+        # Plus anything stored locally and not synced yet
+        return documents + self.local.list()
             
-    def get_full_document(self, doc_id):
-        """Get complete document data"""
+    def count_documents(self):
+        """Number of stored documents (estimated for MongoDB)"""
+        count = self.local.count()
         try:
-            # First try MongoDB
             if self.client:
+                count += self.db.documents.estimated_document_count()
+        except Exception:
+            logger.exception("Error counting documents")
+        return count
+
+    def get_documents_page(self, after_id=None, limit=100, sort="name"):
+        """One page of (id, file_name, file_type) in `sort` order, starting after `after_id`.
+
+        Returns {"documents": [...], "next": after_id for the next page or
+        None}. Pages are read with keyset conditions on (sort field, _id), so
+        any page costs one index range scan however deep it is. Documents
+        still in the local store are listed before those in MongoDB.
+        """
+        if sort not in DOCUMENT_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        if after_id is None:
+            self.reconnect()
+        documents = []
+        remote_after = None
+        if after_id is None or is_local_id(after_id):
+            documents = self.local.page(after_id, limit, sort)
+            if len(documents) == limit:
+                return {"documents": documents, "next": documents[-1][0]}
+        else:
+            remote_after = after_id
+        if not self.client:
+            return {"documents": documents, "next": None}
+
+        field, direction = DOCUMENT_SORTS[sort]
+        remaining = limit - len(documents)
+        try:
+            query = {}
+            if remote_after is not None:
+                anchor = self.db.documents.find_one({"_id": ObjectId(remote_after)}, {field: 1})
+                if anchor is None:
+                    return {"documents": documents, "next": None}  # deleted since the last page
+                op = "$gt" if direction == 1 else "$lt"
+                query = {"$or": [{field: {op: anchor.get(field)}},
+                                 {field: anchor.get(field), "_id": {op: anchor["_id"]}}]}
+            found = list(self.db.documents.find(query, {"file_name": 1, "file_type": 1})
+                         .sort([(field, direction), ("_id", direction)]).limit(remaining))
+        except Exception:
+            logger.exception("Error getting documents")
+            return {"documents": documents, "next": None}
+        documents += [(str(doc["_id"]), doc["file_name"], doc["file_type"]) for doc in found]
+        return {"documents": documents, "next": str(found[-1]["_id"]) if len(found) == remaining else None}
+
+    def get_full_document(self, doc_id, content=True):
+        """Get complete document data.
+
+        With content=False the file itself is not read (content is None);
+        use open_document_stream() or download_to() for large files.
+        """
+        doc_id = self._resolve(doc_id)
+        try:
+            # First try MongoDB
+            if self.client and not is_local_id(doc_id):
                 document = self.db.documents.find_one({"_id": ObjectId(doc_id)})
                 if not document:
                     return None
                 
-                try:    
-                    # Retrieve file content from GridFS
-                    file_content = self.fs.get(document["file_id"]).read()
-                except Exception as e:
-                    print(f"GridFS error: {str(e)}")
-                    return None
+                file_content = None
+                if content:
+                    try:    
+                        # Retrieve file content from GridFS
+                        file_content = self.fs.get(document["file_id"]).read()
+                    except Exception as e:
+                        logger.error("GridFS error: %s", e)
+                        return None
                 
                 return {
                     "id": str(document["_id"]),
@@ -191,49 +636,147 @@ class DocumentDatabase:
                 }
         
         except Exception as e:
-            print(f"Error getting full document: {str(e)}")
+            logger.error("Error getting full document: %s", e)
         
-        # Fallback to in-memory storage
+        # Fallback to the local store
         try:
-            doc = self.fallback_storage[int(doc_id)]
-            return {
-                "id": doc["id"],
-                "file_name": doc["file_name"],
-                "file_type": doc["file_type"],
-                "content": doc["content"],
-                "extracted_text": doc["extracted_text"],
-                "metadata": doc["metadata"]
-            }
-        except (IndexError, ValueError):
+            doc = self.local.get(doc_id)
+        except ValueError:
+            return None
+        if doc is None:
             return None
+        return {
+            "id": doc["id"],
+            "file_name": doc["file_name"],
+            "file_type": doc["file_type"],
+            "content": self.local.read(doc_id) if content else None,
+            "extracted_text": doc["extracted_text"],
+            "metadata": doc["metadata"]
+        }
+
+    def get_document_info(self, doc_id):
+        """Name, type, size and metadata of a document, without its text or content"""
+        doc_id = self._resolve(doc_id)
+        try:
+            if self.client and not is_local_id(doc_id):
+                document = self.db.documents.find_one(
+                    {"_id": ObjectId(doc_id)},
+                    {"file_name": 1, "file_type": 1, "metadata": 1, "sha256": 1, "created_at": 1})
+                if not document:
+                    return None
+                return {
+                    "id": str(document["_id"]),
+                    "file_name": document["file_name"],
+                    "file_type": document["file_type"],
+                    "size": (document.get("metadata") or {}).get("size"),
+                    "sha256": document.get("sha256"),
+                    "metadata": document.get("metadata") or {},
+                    "created_at": document.get("created_at"),
+                }
+        except Exception as e:
+            logger.error("Error getting document info: %s", e)
+
+        # Fallback to the local store
+        try:
+            return self.local.get(doc_id, text=False)
+        except ValueError:
+            return None
+
+    def open_document_stream(self, doc_id):
+        """Readable file object for a document's content, or None if it does not exist.
+
+        For GridFS this is a GridOut that fetches one chunk at a time; the
+        caller should close it.
+        """
+        doc_id = self._resolve(doc_id)
+        try:
+            if self.client and not is_local_id(doc_id):
+                document = self.db.documents.find_one({"_id": ObjectId(doc_id)}, {"file_id": 1})
+                if not document:
+                    return None
+                return self.fs.get(document["file_id"])
+        except Exception as e:
+            logger.error("Error opening document: %s", e)
+
+        # Fallback to the local store, read straight from the SQLite blob
+        try:
+            return self.local.open_blob(doc_id)
+        except ValueError:
+            return None
+
+    def iter_document_chunks(self, doc_id, chunk_size=GRIDFS_CHUNK_SIZE):
+        """Yield a document's content in pieces of at most `chunk_size` bytes"""
+        stream = self.open_document_stream(doc_id)
+        if stream is None:
+            raise KeyError(f"Document {doc_id} not found")
+        try:
+            while True:
+                data = stream.read(chunk_size)
+                if not data:
+                    return
+                yield data
+        finally:
+            stream.close()
+
+    def download_to(self, doc_id, path, progress=None):
+        """Copy a document's content to `path` chunk by chunk; returns the bytes written.
+
+        The file is written next to `path` and renamed into place when
+        complete. `progress(written, total)` is called after every chunk.
+        """
+        stream = self.open_document_stream(doc_id)
+        if stream is None:
+            raise KeyError(f"Document {doc_id} not found")
+        total = getattr(stream, "length", None)
+        partial = path + ".part"
+        written = 0
+        try:
+            with open(partial, "wb") as f:
+                while True:
+                    data = stream.read(GRIDFS_CHUNK_SIZE)
+                    if not data:
+                        break
+                    f.write(data)
+                    written += len(data)
+                    if progress:
+                        progress(written, total)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        finally:
+            stream.close()
+        return written
         
+    @_changes_documents
     def delete_document(self, doc_id):
         """Delete a document by its ID"""
+        doc_id = self._resolve(doc_id)
         try:
-            if self.client:
+            if self.client and not is_local_id(doc_id):
                 # Convert string to ObjectId
                 obj_id = ObjectId(doc_id)
                 # First, get the document to find the associated GridFS file_id
                 document = self.db.documents.find_one({"_id": obj_id})
                 if document:
-                    # Delete the GridFS file
-                    self.fs.delete(document["file_id"])
                     # Delete the document metadata
                     result = self.db.documents.delete_one({"_id": obj_id})
+                    # Delete the GridFS file unless another document shares the content
+                    if not self.db.documents.find_one({"file_id": document["file_id"]}, {"_id": 1}):
+                        self.fs.delete(document["file_id"])
                     return result.deleted_count > 0
                 return False
         except (InvalidId, Exception) as e:
-            print(f"Error deleting document from MongoDB: {str(e)}")
+            logger.error("Error deleting document from MongoDB: %s", e)
         
-       # Fallback: delete from in-memory storage
+       # Fallback: delete from the local store
         try:
-            index = int(doc_id)
-            if 0 <= index < len(self.fallback_storage):
-                del self.fallback_storage[index]
-                return True
-            return False
-        except (ValueError, IndexError):
+            deleted = self.local.delete(doc_id)
+        except ValueError:
             return False
+        self.fallback_index.remove(str(doc_id))
+        return deleted
 
-# Global Document Database Instance
-DOC_DB = DocumentDatabase()
+# Global Document Database Instance; connects on first use (or ensure_connected())
+DOC_DB = DocumentDatabase(connect=False)
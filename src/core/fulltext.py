@@ -0,0 +1,220 @@
+import bisect
+import math
+import re
+import threading
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# "quoted phrase", -negated, prefix*, plain term
+_QUERY_PART = re.compile(r'(-?)"([^"]*)"|(-?)(\w+)(\*?)', re.UNICODE)
+
+# Words MongoDB's English text index ignores; dropping them keeps rankings comparable
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can did do does doing down during each few for from further had has
+have having he her here hers herself him himself his how i if in into is it its itself just me
+more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where which while who whom
+why will with you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    """Lower-cased word tokens without stop words"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class Query:
+    """A search string parsed like MongoDB $text: terms are ORed and ranked,
+    "phrases" must all appear, -terms exclude documents, and term* matches prefixes"""
+    def __init__(self, text):
+        self.terms = []      # plain terms
+        self.prefixes = []   # terms written as word*
+        self.phrases = []    # token lists that must appear in order
+        self.excluded = []   # terms and phrases after a minus sign
+        self.needle = None   # text a snippet is centred on: first phrase or term
+        for match in _QUERY_PART.finditer(text):
+            negated_phrase, phrase, negated, word, star = match.groups()
+            if phrase is not None:
+                tokens = tokenize(phrase)
+                if tokens:
+                    (self.excluded if negated_phrase else self.phrases).append(tokens)
+                    if not negated_phrase and not self.phrases[1:]:
+                        self.needle = " ".join(phrase.lower().split())
+            else:
+                word = word.lower()
+                if negated:
+                    if word not in STOP_WORDS:
+                        self.excluded.append([word])
+                elif star:
+                    self.prefixes.append(word)
+                elif word not in STOP_WORDS:
+                    self.terms.append(word)
+        if self.needle is None:
+            self.needle = (self.terms or self.prefixes or [None])[0]
+
+    def is_empty(self):
+        return not (self.terms or self.prefixes or self.phrases)
+
+    def matches_token(self, token):
+        token = token.lower()
+        if token in self.terms or any(token in phrase for phrase in self.phrases):
+            return True
+        return any(token.startswith(prefix) for prefix in self.prefixes)
+
+
+def snippet_start(position, width):
+    """Where a snippet of `width` characters around a match at `position` begins"""
+    return max(0, position - width // 4)
+
+
+def make_snippet(text, query, width=200):
+    """The part of `text` around the first match of `query`, `width` characters long"""
+    query = query if isinstance(query, Query) else Query(query)
+    position = text.lower().find(query.needle) if query.needle else -1
+    return text[snippet_start(position, width):][:width]
+
+
+def highlight_spans(snippet, query):
+    """(start, end) offsets of the words in `snippet` that the query matches"""
+    query = query if isinstance(query, Query) else Query(query)
+    return [match.span() for match in _TOKEN.finditer(snippet) if query.matches_token(match.group())]
+
+
+class InvertedIndex:
+    """In-memory full-text index with BM25 ranking, phrase, prefix and negated terms.
+
+    Documents are added and removed one at a time, so the index stays in
+    step with a store without rebuilding. Postings keep token positions
+    for phrase matching; a sorted vocabulary answers prefix queries.
+    """
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}     # term -> {doc_key: [positions]}
+        self._doc_terms = {}    # doc_key -> set of terms, for remove()
+        self._doc_lengths = {}  # doc_key -> token count
+        self._total_length = 0
+        self._vocabulary = []   # sorted terms
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_key):
+        return doc_key in self._doc_lengths
+
+    def add(self, doc_key, text):
+        """Index `text` under `doc_key`, replacing what was indexed for it before"""
+        tokens = tokenize(text or "")
+        positions = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        with self._lock:
+            if doc_key in self._doc_lengths:
+                self._remove(doc_key)
+            for term, term_positions in positions.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                postings[doc_key] = term_positions
+            self._doc_terms[doc_key] = set(positions)
+            self._doc_lengths[doc_key] = len(tokens)
+            self._total_length += len(tokens)
+
+    def remove(self, doc_key):
+        with self._lock:
+            if doc_key in self._doc_lengths:
+                self._remove(doc_key)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            self._vocabulary = []
+
+    def _remove(self, doc_key):
+        for term in self._doc_terms.pop(doc_key):
+            postings = self._postings[term]
+            del postings[doc_key]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+        self._total_length -= self._doc_lengths.pop(doc_key)
+
+    def expand_prefix(self, prefix, limit=200):
+        """Indexed terms starting with `prefix` (at most `limit`)"""
+        with self._lock:
+            start = bisect.bisect_left(self._vocabulary, prefix)
+            terms = []
+            for term in self._vocabulary[start:]:
+                if not term.startswith(prefix) or len(terms) >= limit:
+                    break
+                terms.append(term)
+            return terms
+
+    def search(self, text, limit=None):
+        """[(doc_key, score)] best first for a query string (see Query)"""
+        query = text if isinstance(text, Query) else Query(text)
+        if query.is_empty():
+            return []
+        with self._lock:
+            scored_terms = list(query.terms)
+            for prefix in query.prefixes:
+                scored_terms.extend(self.expand_prefix(prefix))
+            for phrase in query.phrases:
+                scored_terms.extend(phrase)
+
+            scores = self._bm25(set(scored_terms))
+            if query.phrases:
+                candidates = None
+                for phrase in query.phrases:
+                    matches = self._phrase_matches(phrase)
+                    candidates = matches if candidates is None else candidates & matches
+                scores = {key: score for key, score in scores.items() if key in candidates}
+            for excluded in query.excluded:
+                for key in self._phrase_matches(excluded):
+                    scores.pop(key, None)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked[:limit] if limit else ranked
+
+    def _bm25(self, terms):
+        count = len(self._doc_lengths)
+        if not count:
+            return {}
+        average = self._total_length / count or 1.0
+        scores = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, positions in postings.items():
+                frequency = len(positions)
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[key] / average)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def _phrase_matches(self, tokens):
+        """Documents containing `tokens` at consecutive positions"""
+        postings = [self._postings.get(token) for token in tokens]
+        if not all(postings):
+            return set()
+        # Walk the rarest token's documents and check the others around it
+        candidates = set(min(postings, key=len))
+        for other in postings:
+            candidates &= other.keys()
+        if len(tokens) == 1:
+            return candidates
+        matches = set()
+        for key in candidates:
+            following = [set(p[key]) for p in postings[1:]]
+            for start in postings[0][key]:
+                if all(start + offset in positions for offset, positions in enumerate(following, start=1)):
+                    matches.add(key)
+                    break
+        return matches
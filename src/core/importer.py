@@ -0,0 +1,218 @@
+import itertools
+import logging
+import os
+import re
+import tempfile
+import time
+from urllib.parse import quote_plus
+
+import pandas as pd
+import pymysql
+
+# Server/client refusals of LOAD DATA LOCAL INFILE; anything else is a data error
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 2068, 3948}
+
+logger = logging.getLogger(__name__)
+
+
+def table_name_for(file_path):
+    """Derive a safe table name from a file name"""
+    base_name = os.path.basename(file_path).split('.')[0]
+    table_name = re.sub(r"[^a-zA-Z0-9_]", "", base_name)
+    return table_name.strip("_") or "new_table"
+
+
+def sql_type_for(series):
+    """MySQL column type for a pandas column"""
+    dtype = series.dtype
+    if series.isna().all():
+        # Nothing to go on in the sample; text accepts whatever later chunks hold
+        return "VARCHAR(255)"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATETIME"
+    elif "int" in str(dtype):
+        return "INT"
+    elif "float" in str(dtype):
+        return "FLOAT"
+    elif "object" in str(dtype):
+        return "VARCHAR(255)"
+    elif "bool" in str(dtype):
+        return "BOOLEAN"
+    return "VARCHAR(255)"
+
+
+def infer_schema(sample):
+    """[(source column, sanitized column, sql type)] for a sample DataFrame"""
+    schema = []
+    used = {"id"}  # reserved for the generated primary key
+    for idx, col in enumerate(sample.columns):
+        sanitized_col = re.sub(r"[^a-zA-Z0-9_]", "", str(col))
+        sanitized_col = sanitized_col.strip("_") or f"col_{idx}"
+        unique_col, n = sanitized_col, 1
+        while unique_col.lower() in used:
+            unique_col = f"{sanitized_col}_{n}"
+            n += 1
+        used.add(unique_col.lower())
+        schema.append((col, unique_col, sql_type_for(sample[col])))
+    return schema
+
+
+class DatasetImporter:
+    """Streams a CSV/Excel file into a new MySQL table, one chunk at a time.
+
+    The schema is inferred from the first chunk. Chunks are loaded with
+    LOAD DATA LOCAL INFILE when the server allows it and with multi-row
+    inserts (pandas to_sql method="multi") otherwise, so memory use is
+    bounded by the chunk size rather than the file size.
+    """
+    def __init__(self, db, chunk_size=20000, insert_batch_size=1000, engine=None):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.insert_batch_size = insert_batch_size
+        self._engine = engine  # SQLAlchemy engine for to_sql; built from db.config when None
+
+    def import_file(self, file_path, table_name, progress=None):
+        """Create `table_name` and fill it from `file_path`.
+
+        `progress(rows_done, fraction)` is called after every chunk; fraction
+        is the share of the file read so far, or None if unknown.
+        """
+        started = time.perf_counter()
+        chunks = self.read_chunks(file_path)
+        first = next(chunks, None)
+        if first is None:
+            raise ValueError("File contains no data")
+        schema = infer_schema(first[0])
+        self.create_table(table_name, schema)
+
+        # "local_infile": false in mysql_config.json never offers local files to the server
+        allowed = self.db.config.get("local_infile", True)
+        method = "load_data" if allowed and self.db.local_infile_enabled() else "multi"
+        loader = None  # dedicated LOAD DATA LOCAL connection; pooled ones cannot read local files
+        rows = 0
+        try:
+            for chunk, fraction in itertools.chain([first], chunks):
+                chunk = self.prepare_chunk(chunk, schema)
+                if method == "load_data":
+                    try:
+                        if loader is None:
+                            loader = self.db.open_connection(local_infile=True)
+                        self._load_data(loader, chunk, table_name)
+                    except pymysql.err.MySQLError as e:
+                        if not e.args or e.args[0] not in LOCAL_INFILE_DISABLED_ERRORS:
+                            raise
+                        logger.info("LOAD DATA LOCAL INFILE refused (%s), using multi-row inserts", e)
+                        method = "multi"
+                if method == "multi":
+                    self._insert_multi(chunk, table_name)
+                rows += len(chunk)
+                if progress:
+                    progress(rows, fraction)
+        except Exception:
+            # Do not leave a half-imported table behind
+            self.db._execute_sql(f"DROP TABLE IF EXISTS `{table_name}`")
+            raise
+        finally:
+            if loader is not None:
+                loader.close()
+        return {"table": table_name, "rows": rows, "method": method,
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    def read_chunks(self, file_path):
+        """Yield (DataFrame, fraction of file read) chunks"""
+        if file_path.lower().endswith(".csv"):
+            return self._csv_chunks(file_path)
+        elif file_path.lower().endswith(".xlsx"):
+            return self._xlsx_chunks(file_path)
+        return self._xls_chunks(file_path)
+
+    def create_table(self, table_name, schema):
+        columns = [f"`{sanitized}` {sql_type}" for _, sanitized, sql_type in schema]
+        # Add primary key
+        columns.append("`id` INT AUTO_INCREMENT PRIMARY KEY")
+        create_table_query = f"CREATE TABLE `{table_name}` ({', '.join(columns)})"
+        logger.debug("Generated Query: %s", create_table_query)
+        self.db._execute_sql(f"DROP TABLE IF EXISTS `{table_name}`", commit=True)
+        if not self.db._execute_sql(create_table_query, commit=True):
+            raise Exception(f"Failed to create table: {self.db.last_error}")
+
+    def prepare_chunk(self, chunk, schema):
+        """Rename columns to their sanitized names and normalize values for MySQL"""
+        chunk = chunk.rename(columns={source: sanitized for source, sanitized, _ in schema})
+        for _, col, sql_type in schema:
+            if sql_type == "DATETIME":
+                chunk[col] = pd.to_datetime(chunk[col], errors="coerce").dt.strftime('%Y-%m-%d %H:%M:%S')
+            elif sql_type == "BOOLEAN":
+                chunk[col] = chunk[col].map({True: 1, False: 0})
+        return chunk[[sanitized for _, sanitized, _ in schema]]
+
+    def _csv_chunks(self, file_path):
+        total = os.path.getsize(file_path) or 1
+        with open(file_path, "rb") as f:
+            for chunk in pd.read_csv(f, chunksize=self.chunk_size):
+                # The parser reads ahead in blocks, so this is approximate
+                yield chunk, min(f.tell() / total, 1.0)
+
+    def _xlsx_chunks(self, file_path):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(h) if h is not None else f"Unnamed: {i}"
+                      for i, h in enumerate(next(rows, ()))]
+            total = max((sheet.max_row or 0) - 1, 0)
+            done = 0
+            while True:
+                batch = list(itertools.islice(rows, self.chunk_size))
+                if not batch:
+                    break
+                done += len(batch)
+                yield pd.DataFrame(batch, columns=header), (min(done / total, 1.0) if total else None)
+        finally:
+            workbook.close()
+
+    def _xls_chunks(self, file_path):
+        # The legacy .xls reader has no streaming mode; slice the sheet instead
+        df = pd.read_excel(file_path)
+        for start in range(0, len(df), self.chunk_size):
+            yield df.iloc[start:start + self.chunk_size], min((start + self.chunk_size) / len(df), 1.0)
+
+    def _load_data(self, conn, chunk, table_name):
+        columns = list(chunk.columns)
+        variables = ", ".join(f"@v{i}" for i in range(len(columns)))
+        # pandas reads empty fields as NaN, so an empty field always means NULL
+        assignments = ", ".join(f"`{col}` = NULLIF(@v{i}, '')" for i, col in enumerate(columns))
+        query = (f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` CHARACTER SET utf8mb4 "
+                 "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                 "LINES TERMINATED BY '\\n' "
+                 f"({variables}) SET {assignments}")
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                chunk.to_csv(f, header=False, index=False, lineterminator="\n")
+            try:
+                with conn.cursor() as cursor:
+                    self.db._execute(cursor, query, (path,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            os.remove(path)
+
+    def _insert_multi(self, chunk, table_name):
+        chunk.to_sql(name=table_name, con=self.engine(), if_exists="append", index=False,
+                     method="multi", chunksize=self.insert_batch_size)
+
+    def engine(self):
+        """SQLAlchemy engine for the fallback path, created once per importer"""
+        if self._engine is None:
+            from sqlalchemy import create_engine
+            db_config = self.db.config
+            connection_string = (
+                f"mysql+pymysql://{quote_plus(db_config['user'])}:{quote_plus(db_config['password'])}"
+                f"@{db_config['host']}/{db_config['database']}"
+            )
+            self._engine = create_engine(connection_string, pool_pre_ping=True)
+        return self._engine
@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("core.queries")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Statement shape with literals and placeholders replaced by `?`.
+
+    Queries that differ only in their values share a fingerprint, so
+    statistics group e.g. every page fetch of a table together.
+    """
+    text = _STRING_LITERAL.sub("?", query)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUE_LISTS.sub("(?)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryEvent:
+    """One executed statement"""
+    __slots__ = ("query", "fingerprint", "seconds", "rowcount", "batch", "error", "thread", "timestamp")
+
+    def __init__(self, query, fingerprint, seconds, rowcount, batch, error):
+        self.query = query
+        self.fingerprint = fingerprint
+        self.seconds = seconds
+        self.rowcount = rowcount
+        self.batch = batch  # parameter rows for executemany, else None
+        self.error = error
+        self.thread = threading.current_thread().name
+        self.timestamp = time.time()
+
+    def as_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "seconds": round(self.seconds, 6),
+            "rowcount": self.rowcount,
+            "batch": self.batch,
+            "error": str(self.error) if self.error else None,
+            "thread": self.thread,
+            "timestamp": self.timestamp,
+        }
+
+
+class Instrumentation:
+    """Collects timing, row counts and fingerprints for every statement.
+
+    Per-fingerprint totals and the `slow_log_size` slowest statements are
+    kept in memory. Listeners registered with add_listener() receive
+    QueryEvents, optionally sampled; failed statements are always delivered.
+    Statements slower than `slow_threshold` seconds are logged as warnings,
+    everything else only at DEBUG level on the "core.queries" logger.
+    """
+    def __init__(self, slow_threshold=1.0, slow_log_size=50, fingerprint_cache_size=1024):
+        self.enabled = True
+        self.slow_threshold = slow_threshold
+        self.slow_log_size = slow_log_size
+        self._fingerprint_cache_size = fingerprint_cache_size
+        self._fingerprints = OrderedDict()
+        self._listeners = []   # (callback, sample_rate)
+        self._stats = {}       # fingerprint -> [count, total seconds, max seconds, rows, errors]
+        self._slowest = []     # min-heap of (seconds, seq, event)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback, sample_rate=1.0):
+        """callback(QueryEvent) for a `sample_rate` share of statements"""
+        self._listeners.append((callback, sample_rate))
+        return callback
+
+    def remove_listener(self, callback):
+        self._listeners = [(cb, rate) for cb, rate in self._listeners if cb is not callback]
+
+    def timed(self, cursor, query, params=None, many=False):
+        """Run cursor.execute/executemany and record it; returns the cursor's rowcount"""
+        if not self.enabled:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params or ())
+            return cursor.rowcount
+        started = time.perf_counter()
+        try:
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params or ())
+        except Exception as e:
+            self.record(query, time.perf_counter() - started, None,
+                        batch=len(params) if many else None, error=e)
+            raise
+        self.record(query, time.perf_counter() - started, cursor.rowcount,
+                    batch=len(params) if many else None)
+        return cursor.rowcount
+
+    def record(self, query, seconds, rowcount, batch=None, error=None):
+        if not self.enabled:
+            return
+        event = QueryEvent(query, self._fingerprint(query), seconds, rowcount, batch, error)
+        with self._lock:
+            stats = self._stats.get(event.fingerprint)
+            if stats is None:
+                stats = self._stats[event.fingerprint] = [0, 0.0, 0.0, 0, 0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            if rowcount and rowcount > 0:
+                stats[3] += rowcount
+            if error is not None:
+                stats[4] += 1
+            if self.slow_log_size:
+                entry = (seconds, next(self._seq), event)
+                if len(self._slowest) < self.slow_log_size:
+                    heapq.heappush(self._slowest, entry)
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+        if error is not None:
+            logger.error("%s failed after %.3fs: %s", event.fingerprint, seconds, error)
+        elif seconds >= self.slow_threshold:
+            logger.warning("Slow query (%.3fs, %s rows): %s", seconds, rowcount, event.fingerprint)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%.4fs %s rows: %s", seconds, rowcount, event.fingerprint)
+
+        for callback, sample_rate in self._listeners:
+            if error is None and sample_rate < 1.0 and random.random() >= sample_rate:
+                continue
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Query listener failed")
+
+    def slowest(self, limit=None):
+        """Slowest recorded statements, slowest first"""
+        with self._lock:
+            events = [event for _, _, event in sorted(self._slowest, reverse=True)]
+        return events[:limit] if limit else events
+
+    def stats(self):
+        """{fingerprint: {count, total_seconds, mean_seconds, max_seconds, rows, errors}}, costliest first"""
+        with self._lock:
+            items = [(fp, list(values)) for fp, values in self._stats.items()]
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return OrderedDict(
+            (fp, {"count": count, "total_seconds": round(total, 6), "mean_seconds": round(total / count, 6),
+                  "max_seconds": round(longest, 6), "rows": rows, "errors": errors})
+            for fp, (count, total, longest, rows, errors) in items)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slowest = []
+
+    def _fingerprint(self, query):
+        # Hot paths repeat the same few statements; remember their fingerprints
+        cached = self._fingerprints.get(query)
+        if cached is not None:
+            return cached
+        result = fingerprint(query)
+        with self._lock:
+            self._fingerprints[query] = result
+            if len(self._fingerprints) > self._fingerprint_cache_size:
+                self._fingerprints.popitem(last=False)
+        return result
@@ -0,0 +1,139 @@
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_job_ids = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that noticed it was cancelled"""
+
+
+class Job:
+    """Handle for work submitted to a JobExecutor"""
+    def __init__(self, executor, name, silent=False):
+        self.id = next(_job_ids)
+        self.name = name
+        self.silent = silent  # hidden from status listeners (e.g. page prefetches)
+        self.future = None
+        self._executor = executor
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Pending jobs never start; running ones stop at their next check_cancelled()"""
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"{self.name} was cancelled")
+
+    def report(self, done, total=None, message=None):
+        """Report progress from inside the job"""
+        self._executor._notify("progress", self, (done, total, message))
+
+
+class JobExecutor:
+    """Runs callables on a worker thread pool and hands results back through `dispatch`.
+
+    `dispatch(callback)` decides where result, error and listener callbacks
+    run. The GUI passes one that queues them for the Tk main loop; headless
+    callers can keep the default, which runs them on the worker thread.
+    """
+    def __init__(self, max_workers=4, dispatch=None, after_job=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._dispatch = dispatch or (lambda callback: callback())
+        self._after_job = after_job  # runs on the worker after every job (e.g. release a DB connection)
+        self._listeners = []
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """listener(event, job, info) for started/progress/done/failed/cancelled events"""
+        self._listeners.append(listener)
+
+    def submit(self, fn, *args, name=None, on_done=None, on_error=None, silent=False,
+               with_job=False, **kwargs):
+        """Run fn(*args, **kwargs) on a worker and return its Job.
+
+        on_done(result) / on_error(exception) are delivered through dispatch.
+        With `with_job`, fn also receives the Job as `job=` so it can report
+        progress and honour cancellation.
+        """
+        job = Job(self, name or getattr(fn, "__name__", "job"), silent=silent)
+        if with_job:
+            kwargs["job"] = job
+
+        def run():
+            self._notify("started", job)
+            try:
+                job.check_cancelled()
+                return fn(*args, **kwargs)
+            finally:
+                if self._after_job:
+                    self._after_job()
+
+        with self._lock:
+            self._active[job.id] = job
+        job.future = self._pool.submit(run)
+        job.future.add_done_callback(lambda _: self._finished(job, on_done, on_error))
+        return job
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._active.values())
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
+
+    def _finished(self, job, on_done, on_error):
+        with self._lock:
+            self._active.pop(job.id, None)
+        future = job.future
+        error = None
+        result = None
+        if future.cancelled():
+            error = JobCancelled(f"{job.name} was cancelled")
+        else:
+            error = future.exception()
+            if error is None:
+                result = future.result()
+
+        def deliver():
+            if error is None:
+                self._notify_now("done", job, result)
+                if on_done:
+                    on_done(result)
+            elif isinstance(error, JobCancelled):
+                self._notify_now("cancelled", job, error)
+            else:
+                self._notify_now("failed", job, error)
+                if on_error:
+                    on_error(error)
+                else:
+                    logger.error("Job '%s' failed: %s", job.name, error)
+        self._dispatch(deliver)
+
+    def _notify(self, event, job, info=None):
+        if self._listeners:
+            self._dispatch(lambda: self._notify_now(event, job, info))
+
+    def _notify_now(self, event, job, info):
+        for listener in self._listeners:
+            try:
+                listener(event, job, info)
+            except Exception:
+                logger.exception("Job listener failed")
@@ -0,0 +1,259 @@
+import datetime
+import io
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    file_type TEXT,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    extracted_text TEXT,
+    metadata TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_file_name ON documents(file_name);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents(created_at);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents(sha256);
+-- Local ids handed out before a document moved to MongoDB keep resolving
+CREATE TABLE IF NOT EXISTS synced (
+    local_id INTEGER PRIMARY KEY,
+    remote_id TEXT NOT NULL
+);
+"""
+
+# Page orders for LocalDocumentStore.page(); the index on the column ends in the rowid (id)
+SORT_COLUMNS = {
+    "name": ("file_name", "ASC"),
+    "newest": ("created_at", "DESC"),
+    "oldest": ("created_at", "ASC"),
+}
+
+
+def default_path():
+    return os.path.join(os.path.expanduser("~"), ".document_db", "fallback_documents.sqlite3")
+
+
+class BlobReader:
+    """Read-only file object over one stored blob.
+
+    Uses sqlite3 incremental blob I/O (Python 3.11+), so reads copy only
+    the requested range; on older Pythons the blob is read in one piece.
+    """
+    def __init__(self, path, rowid, size):
+        self.length = size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if hasattr(self._conn, "blobopen"):
+            self._blob = self._conn.blobopen("blobs", "content", rowid, readonly=True)
+        else:
+            row = self._conn.execute("SELECT content FROM blobs WHERE rowid = ?", (rowid,)).fetchone()
+            self._blob = io.BytesIO(row[0])
+
+    def read(self, size=-1):
+        return self._blob.read(size)
+
+    def close(self):
+        try:
+            self._blob.close()
+        finally:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalDocumentStore:
+    """Documents kept in a SQLite file while MongoDB is unavailable.
+
+    Ids are AUTOINCREMENT integers, so they are never reused or shifted by
+    deletes. File contents are stored once per SHA-256 in `blobs`. Once a
+    document has been copied to MongoDB, mark_synced() removes it and
+    remembers which remote id replaced it.
+    """
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def insert(self, file_name, file_type, content, extracted_text, metadata, sha256):
+        created_at = datetime.datetime.utcnow().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO blobs (sha256, size, content) VALUES (?, ?, ?)",
+                               (sha256, len(content), sqlite3.Binary(content)))
+            cursor = self._conn.execute(
+                "INSERT INTO documents (file_name, file_type, sha256, extracted_text, metadata, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (file_name, file_type, sha256, extracted_text, json.dumps(metadata, default=str), created_at))
+            return str(cursor.lastrowid)
+
+    def get(self, doc_id, text=True):
+        """Document fields without content, or None"""
+        columns = "id, file_name, file_type, documents.sha256, metadata, created_at, size"
+        if text:
+            columns += ", extracted_text"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM documents JOIN blobs USING (sha256) WHERE id = ?",
+                (self._key(doc_id),)).fetchone()
+        return self._document(row) if row else None
+
+    def open_blob(self, doc_id):
+        """BlobReader for a document's content, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blobs.rowid, size FROM documents JOIN blobs USING (sha256) WHERE id = ?",
+                (self._key(doc_id),)).fetchone()
+        return BlobReader(self.path, row[0], row[1]) if row else None
+
+    def read(self, doc_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM documents JOIN blobs USING (sha256) WHERE id = ?",
+                (self._key(doc_id),)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def delete(self, doc_id):
+        """Delete a document and, if nothing else uses it, its blob"""
+        key = self._key(doc_id)
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT sha256 FROM documents WHERE id = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (key,))
+            self._delete_unused_blob(row[0])
+            return True
+
+    def list(self):
+        """[(id, file_name, file_type)] in insertion order"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, file_name, file_type FROM documents ORDER BY id").fetchall()
+        return [(str(row[0]), row[1], row[2]) for row in rows]
+
+    def page(self, after_id=None, limit=100, sort="name"):
+        """[(id, file_name, file_type)] following `after_id` in `sort` order (keyset pagination)"""
+        column, order = SORT_COLUMNS[sort]
+        compare = ">" if order == "ASC" else "<"
+        where, params = "", []
+        with self._lock:
+            if after_id is not None:
+                anchor = self._conn.execute(f"SELECT {column}, id FROM documents WHERE id = ?",
+                                            (self._key(after_id),)).fetchone()
+                if anchor is None:
+                    return []
+                where = f"WHERE {column} {compare} ? OR ({column} = ? AND id {compare} ?)"
+                params = [anchor[0], anchor[0], anchor[1]]
+            rows = self._conn.execute(
+                f"SELECT id, file_name, file_type FROM documents {where}"
+                f" ORDER BY {column} {order}, id {order} LIMIT ?", params + [limit]).fetchall()
+        return [(str(row[0]), row[1], row[2]) for row in rows]
+
+    def texts(self):
+        """Yield (id, extracted_text) for indexing"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, extracted_text FROM documents ORDER BY id").fetchall()
+        for row in rows:
+            yield str(row[0]), row[1] or ""
+
+    def file_names(self, file_names):
+        """The subset of `file_names` stored locally"""
+        file_names = list(file_names)
+        found = set()
+        with self._lock:
+            for start in range(0, len(file_names), 500):
+                chunk = file_names[start:start + 500]
+                marks = ", ".join("?" * len(chunk))
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT file_name FROM documents WHERE file_name IN ({marks})", chunk))
+        return found
+
+    def has_blob(self, sha256):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def pending(self, limit):
+        """Up to `limit` documents with content, oldest first, for syncing"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, file_name, file_type, documents.sha256, metadata, created_at, size, extracted_text,"
+                " content FROM documents JOIN blobs USING (sha256) ORDER BY id LIMIT ?", (limit,)).fetchall()
+        documents = []
+        for row in rows:
+            document = self._document(row)
+            document["content"] = bytes(row["content"])
+            documents.append(document)
+        return documents
+
+    def mark_synced(self, pairs):
+        """Remove documents copied to MongoDB; `pairs` are (local_id, remote_id)"""
+        with self._lock, self._conn:
+            for local_id, remote_id in pairs:
+                key = self._key(local_id)
+                row = self._conn.execute("SELECT sha256 FROM documents WHERE id = ?", (key,)).fetchone()
+                self._conn.execute("INSERT OR REPLACE INTO synced (local_id, remote_id) VALUES (?, ?)",
+                                   (key, str(remote_id)))
+                if row is not None:
+                    self._conn.execute("DELETE FROM documents WHERE id = ?", (key,))
+                    self._delete_unused_blob(row[0])
+
+    def remote_id(self, doc_id):
+        """MongoDB id that replaced a synced local id, or None"""
+        try:
+            key = self._key(doc_id)
+        except ValueError:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT remote_id FROM synced WHERE local_id = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _delete_unused_blob(self, sha256):
+        if self._conn.execute("SELECT 1 FROM documents WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone() is None:
+            self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+
+    @staticmethod
+    def _key(doc_id):
+        key = int(doc_id)
+        if key < 1:
+            raise ValueError(f"Invalid local document id: {doc_id}")
+        return key
+
+    @staticmethod
+    def _document(row):
+        document = {
+            "id": str(row["id"]),
+            "file_name": row["file_name"],
+            "file_type": row["file_type"],
+            "sha256": row["sha256"],
+            "size": row["size"],
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "created_at": row["created_at"],
+        }
+        if "extracted_text" in row.keys():
+            document["extracted_text"] = row["extracted_text"] or ""
+        return document
@@ -0,0 +1,195 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning "this ALGORITHM/LOCK cannot be used for that change"; the next one is tried
+REFUSED_ERRORS = {
+    1800,  # ER_UNKNOWN_ALTER_ALGORITHM (no INSTANT before MySQL 8.0)
+    1801,  # ER_UNKNOWN_ALTER_LOCK
+    1845,  # ER_ALTER_OPERATION_NOT_SUPPORTED
+    1846,  # ER_ALTER_OPERATION_NOT_SUPPORTED_REASON
+}
+
+_VERSION = re.compile(r"(\d+)\.(\d+)\.(\d+)")
+
+
+class OnlineSchemaChange:
+    """Column DDL that keeps the table readable and writable.
+
+    A change is first requested as ALGORITHM=INSTANT (metadata only), then
+    as ALGORITHM=INPLACE, LOCK=NONE (online rebuild); the server refuses
+    either when it cannot honour it. When both are refused, tables of at
+    least `shadow_threshold` rows that have a primary key and no foreign
+    keys are copied into a shadow table: triggers mirror writes into it, it
+    is backfilled in primary-key batches (BatchUpdater, resumable) and
+    swapped in with one atomic RENAME TABLE. Anything else falls back to a
+    plain ALTER TABLE.
+    """
+    def __init__(self, db, shadow_threshold=100000):
+        self.db = db
+        self.shadow_threshold = shadow_threshold
+        self._version = None
+
+    def server_version(self):
+        """(major, minor, patch, is_mariadb); (0, 0, 0, False) if the server does not say"""
+        if self._version is None:
+            try:
+                text = str(self.db._query("SELECT VERSION()", fetch="one")[0])
+                match = _VERSION.search(text)
+                numbers = tuple(int(part) for part in match.groups()) if match else (0, 0, 0)
+                self._version = numbers + ("mariadb" in text.lower(),)
+            except Exception as e:
+                logger.warning("Could not read server version: %s", e)
+                self._version = (0, 0, 0, False)
+        return self._version
+
+    def supports_instant(self):
+        major, minor, patch, mariadb = self.server_version()
+        if not major:
+            return True  # unknown: ask, the server refuses if it cannot
+        return (major, minor, patch) >= ((10, 3, 2) if mariadb else (8, 0, 12))
+
+    def supports_rename_column(self):
+        major, minor, patch, mariadb = self.server_version()
+        return bool(major) and (major, minor, patch) >= ((10, 5, 2) if mariadb else (8, 0, 0))
+
+    def alter(self, table_name, clauses):
+        """Apply ("add", column, data_type), ("rename", old, new), ("drop", column) and
+        ("index", name, [columns]) clauses as one change; returns False on error and keeps it in last_error"""
+        try:
+            statement = f"ALTER TABLE `{table_name}` " + ", ".join(self._clause_sql(table_name, clause)
+                                                                  for clause in clauses)
+        except ValueError as e:
+            return self.db._fail(str(e))
+        algorithms = ["ALGORITHM=INPLACE, LOCK=NONE"]
+        if self.supports_instant():
+            algorithms.insert(0, "ALGORITHM=INSTANT")
+        for algorithm in algorithms:
+            if self.db._execute_sql(f"{statement}, {algorithm}"):
+                logger.info("Altered %s with %s", table_name, algorithm)
+                return True
+            if self._error_code(self.db.last_error) not in REFUSED_ERRORS:
+                return False
+        if self.shadow_eligible(table_name, clauses):
+            try:
+                self.shadow_copy(table_name, clauses)
+                return True
+            except Exception as e:
+                logger.error("Shadow table change of %s failed: %s", table_name, e)
+                self.db.last_error = e
+                return False
+        logger.info("No online algorithm for %s; running a table-copying ALTER", table_name)
+        return self.db._execute_sql(statement)
+
+    def shadow_eligible(self, table_name, clauses):
+        """True if `table_name` should and can be changed through a shadow table"""
+        if not self.shadow_threshold or self.db.estimate_row_count(table_name) < self.shadow_threshold:
+            return False
+        schema = self.db.schema.table(table_name)
+        if schema is None or not schema.key_columns:
+            return False
+        # Triggers and batches are keyed on the primary key, so it has to stay as it is
+        keys = {col.lower() for col in schema.key_columns}
+        if any(name.lower() in keys for clause in clauses if clause[0] in ("rename", "drop") for name in clause[1:3]):
+            return False
+        if any(column["has_fk"] for column in schema.columns):
+            return False
+        referenced = self.db._query(
+            "SELECT 1 FROM information_schema.KEY_COLUMN_USAGE "
+            "WHERE REFERENCED_TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s LIMIT 1",
+            (table_name,), fetch="one")
+        return referenced is None
+
+    def shadow_copy(self, table_name, clauses):
+        """Change `table_name` by building an altered copy and swapping it in.
+
+        A run that died during the backfill resumes when the same change is
+        started again, as long as its shadow table and triggers are in place.
+        """
+        schema = self.db.schema.table(table_name)
+        shadow, retired = f"_{table_name[:50]}_new", f"_{table_name[:50]}_old"
+        triggers = {event: f"_{table_name[:50]}_osc_{event.lower()[:3]}" for event in ("INSERT", "UPDATE", "DELETE")}
+        renames = {clause[1].lower(): clause[2] for clause in clauses if clause[0] == "rename"}
+        drops = {clause[1].lower() for clause in clauses if clause[0] == "drop"}
+        copied = [(col, renames.get(col.lower(), col)) for col in schema.column_names if col.lower() not in drops]
+        job_id = self.db.batch_updater.job_id(table_name, "shadow copy", [json.dumps(clauses)])
+
+        if (self.db.table_exists(shadow) and self._triggers_exist(triggers.values())
+                and self.db.batch_updater.pending(job_id) is not None):
+            logger.info("Resuming shadow copy of %s", table_name)
+        else:
+            self._drop_shadow(shadow, triggers.values())
+            self.db.batch_updater.clear(job_id)
+            self._ddl(f"CREATE TABLE `{shadow}` LIKE `{table_name}`")
+            self._ddl(f"ALTER TABLE `{shadow}` " + ", ".join(self._clause_sql(table_name, c) for c in clauses))
+            for sql in self._trigger_sql(table_name, shadow, triggers, copied, schema.key_columns):
+                self._ddl(sql)
+
+        # Rows the triggers already copied are newer than the backfill's, so IGNORE keeps them
+        target_list = ", ".join(f"`{new}`" for _, new in copied)
+        source_list = ", ".join(f"`{old}`" for old, _ in copied)
+        self.db.batch_updater.run_ranges(
+            table_name, f"INSERT IGNORE INTO `{shadow}` ({target_list}) SELECT {source_list} FROM `{table_name}`"
+                        " WHERE {range}", job_id=job_id)
+
+        self._ddl(f"RENAME TABLE `{table_name}` TO `{retired}`, `{shadow}` TO `{table_name}`")
+        for name in triggers.values():
+            self._ddl(f"DROP TRIGGER IF EXISTS `{name}`")
+        self._ddl(f"DROP TABLE `{retired}`")
+        logger.info("Swapped in altered copy of %s", table_name)
+
+    def _clause_sql(self, table_name, clause):
+        action = clause[0]
+        if action == "add":
+            return f"ADD COLUMN `{clause[1]}` {clause[2]}"
+        if action == "rename":
+            col_info = self.db.schema.column(table_name, clause[1])
+            if not col_info:
+                raise ValueError(f"Column '{clause[1]}' not found in table '{table_name}'")
+            if self.supports_rename_column():
+                return f"RENAME COLUMN `{clause[1]}` TO `{clause[2]}`"
+            return f"CHANGE COLUMN `{clause[1]}` `{clause[2]}` {self.db.column_definition(col_info)}"
+        if action == "drop":
+            return f"DROP COLUMN `{clause[1]}`"
+        if action == "index":
+            return f"ADD INDEX `{clause[1]}` (" + ", ".join(f"`{col}`" for col in clause[2]) + ")"
+        raise ValueError(f"Unknown ALTER TABLE clause: {action}")
+
+    @staticmethod
+    def _trigger_sql(table_name, shadow, triggers, copied, key_columns):
+        target_list = ", ".join(f"`{new}`" for _, new in copied)
+        new_values = ", ".join(f"NEW.`{old}`" for old, _ in copied)
+        replace = f"REPLACE INTO `{shadow}` ({target_list}) VALUES ({new_values})"
+        old_row = " AND ".join(f"`{shadow}`.`{col}` = OLD.`{col}`" for col in key_columns)
+        old_key = "(" + ", ".join(f"OLD.`{col}`" for col in key_columns) + ")"
+        new_key = "(" + ", ".join(f"NEW.`{col}`" for col in key_columns) + ")"
+        return [
+            f"CREATE TRIGGER `{triggers['INSERT']}` AFTER INSERT ON `{table_name}` FOR EACH ROW {replace}",
+            f"CREATE TRIGGER `{triggers['UPDATE']}` AFTER UPDATE ON `{table_name}` FOR EACH ROW BEGIN "
+            f"DELETE FROM `{shadow}` WHERE {old_row} AND NOT ({old_key} <=> {new_key}); {replace}; END",
+            f"CREATE TRIGGER `{triggers['DELETE']}` AFTER DELETE ON `{table_name}` FOR EACH ROW "
+            f"DELETE FROM `{shadow}` WHERE {old_row}",
+        ]
+
+    def _triggers_exist(self, names):
+        names = list(names)
+        rows = self.db._query(
+            "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE() "
+            f"AND TRIGGER_NAME IN ({', '.join(['%s'] * len(names))})", names)
+        return len(rows) == len(names)
+
+    def _drop_shadow(self, shadow, triggers):
+        for name in triggers:
+            self._ddl(f"DROP TRIGGER IF EXISTS `{name}`")
+        self._ddl(f"DROP TABLE IF EXISTS `{shadow}`")
+
+    def _ddl(self, sql):
+        if self.db._execute_sql(sql) is False:
+            raise self.db.last_error
+
+    @staticmethod
+    def _error_code(error):
+        args = getattr(error, "args", None)
+        return args[0] if args and isinstance(args[0], int) else None
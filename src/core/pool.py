@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# MySQL client errors meaning the connection itself is gone (not a bad query)
+LOST_CONNECTION_ERRORS = {
+    2006,  # MySQL server has gone away
+    2013,  # Lost connection to MySQL server during query
+    2014,  # Commands out of sync
+    2055,  # Lost connection to MySQL server at '%s', system error
+}
+
+
+def is_connection_lost(error):
+    """True if a pymysql error means the connection is unusable"""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True
+    if isinstance(error, pymysql.err.OperationalError) and error.args:
+        return error.args[0] in LOST_CONNECTION_ERRORS
+    return False
+
+
+class PoolTimeout(Exception):
+    """No connection became available before the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of pymysql connections.
+
+    Connections are opened on demand up to `max_size`; `warm()` opens
+    `min_size` of them up front. Every checkout pings the connection and
+    replaces it if the server dropped it.
+    """
+    def __init__(self, factory, min_size=1, max_size=5, timeout=10):
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._size = 0  # idle + checked out
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def warm(self):
+        """Open connections until at least `min_size` exist"""
+        while True:
+            # One slot at a time: _open() gives the slot back if connecting fails
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            self.release(self._open())
+
+    def acquire(self, timeout=None):
+        """Check out a healthy connection, waiting up to `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection free after {timeout}s "
+                                      f"(pool max_size={self.max_size})")
+                self._cond.wait(remaining)
+        if conn is None:
+            return self._open()
+        return self._check(conn)
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if `discard` is set"""
+        if not discard:
+            try:
+                conn.rollback()  # never hand out a connection mid-transaction
+            except Exception:
+                discard = True
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+        if discard or self._closed:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = is_connection_lost(e)
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle),
+                    "in_use": self._size - len(self._idle), "max_size": self.max_size}
+
+    def _open(self):
+        # The caller has already reserved a slot in self._size
+        try:
+            return self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _check(self, conn):
+        """Health check on checkout: ping and reconnect if the server went away"""
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception as e:
+            logger.warning("Pooled connection failed health check (%s), opening a new one", e)
+            self._close_quietly(conn)
+            return self._open()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
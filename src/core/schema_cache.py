@@ -0,0 +1,116 @@
+import re
+import threading
+import time
+
+# Statements that change table definitions; group 1 is the table they touch (if named)
+DDL_PATTERN = re.compile(
+    r"^\s*(?:ALTER|CREATE|DROP|TRUNCATE)\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?`?(\w+)`?"
+    r"|^\s*RENAME\s+TABLE\b",
+    re.IGNORECASE)
+
+# One round trip per table: every column plus whether it carries a foreign key
+COLUMNS_QUERY = """
+    SELECT c.COLUMN_NAME, c.DATA_TYPE, c.COLUMN_TYPE, c.IS_NULLABLE, c.COLUMN_DEFAULT,
+           c.EXTRA, c.COLUMN_KEY, c.GENERATION_EXPRESSION,
+           EXISTS (SELECT 1 FROM information_schema.KEY_COLUMN_USAGE k
+                   WHERE k.TABLE_SCHEMA = c.TABLE_SCHEMA AND k.TABLE_NAME = c.TABLE_NAME
+                     AND k.COLUMN_NAME = c.COLUMN_NAME AND k.REFERENCED_TABLE_NAME IS NOT NULL)
+    FROM information_schema.COLUMNS c
+    WHERE c.TABLE_SCHEMA = DATABASE() AND c.TABLE_NAME = %s
+    ORDER BY c.ORDINAL_POSITION
+"""
+
+
+def ddl_target(query):
+    """(is_ddl, table name or None) for a SQL statement"""
+    match = DDL_PATTERN.match(query)
+    if not match:
+        return False, None
+    return True, match.group(1)
+
+
+class TableSchema:
+    """Column definitions of one table, in ordinal order"""
+    def __init__(self, name, rows):
+        self.name = name
+        self.columns = []
+        self._by_name = {}
+        for row in rows:
+            column = {
+                "name": row[0],
+                "data_type": row[1],
+                "column_type": row[2],
+                "nullable": row[3] == "YES",
+                "default": row[4],
+                "extra": row[5] or "",
+                "key": row[6] or "",
+                "generation_expression": row[7] or "",
+                "has_fk": bool(row[8]),
+            }
+            self.columns.append(column)
+            self._by_name[column["name"].lower()] = column  # MySQL column names are case-insensitive
+        self.loaded_at = time.monotonic()
+
+    @property
+    def column_names(self):
+        return [column["name"] for column in self.columns]
+
+    @property
+    def key_columns(self):
+        return [column["name"] for column in self.columns if column["key"] == "PRI"]
+
+    def column(self, column_name):
+        return self._by_name.get(str(column_name).lower())
+
+
+class SchemaCache:
+    """Per-database cache of table definitions read from information_schema.
+
+    Each table is loaded with a single query and kept for `ttl` seconds.
+    DDL run through DatabaseOperations invalidates the affected table; the
+    TTL covers changes made by other clients. Missing tables are not cached,
+    so a table created elsewhere shows up on the next lookup.
+    """
+    def __init__(self, db, ttl=300):
+        self.db = db
+        self.ttl = ttl
+        self._tables = {}  # (database, table) -> TableSchema
+        self._lock = threading.Lock()
+
+    def table(self, table_name):
+        """TableSchema for `table_name`, or None if the table does not exist"""
+        key = self._key(table_name)
+        with self._lock:
+            schema = self._tables.get(key)
+            if schema is not None and time.monotonic() - schema.loaded_at < self.ttl:
+                return schema
+        rows = self.db._query(COLUMNS_QUERY, (table_name,))
+        if not rows:
+            self.invalidate(table_name)
+            return None
+        schema = TableSchema(table_name, rows)
+        with self._lock:
+            self._tables[key] = schema
+        return schema
+
+    def column(self, table_name, column_name):
+        """Column info dict, or None if the table or column does not exist"""
+        schema = self.table(table_name)
+        return schema.column(column_name) if schema else None
+
+    def invalidate(self, table_name=None):
+        """Forget one table, or everything when no table is given"""
+        with self._lock:
+            if table_name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(self._key(table_name), None)
+
+    def invalidate_for(self, query):
+        """Invalidate whatever a DDL statement may have changed; no-op for other statements"""
+        is_ddl, table_name = ddl_target(query)
+        if is_ddl:
+            self.invalidate(table_name)
+
+    def _key(self, table_name):
+        return (self.db.config.get("database"), table_name)
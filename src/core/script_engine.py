@@ -0,0 +1,422 @@
+import inspect
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from .database import MERGE_MODES
+
+# Column changes that can share one ALTER TABLE statement
+ALTER_OPERATIONS = {"add_column", "rename_column", "remove_column"}
+# Row changes that can share one transaction
+DML_OPERATIONS = {"insert_row", "update_row", "delete_row", "conditional_update"}
+
+# Column references in effect expressions
+_COLUMN_REF = re.compile(r"`([^`]+)`")
+
+logger = logging.getLogger(__name__)
+
+
+class ScriptError(ValueError):
+    """A transformation script failed validation or execution"""
+
+
+def load_script(config_file):
+    """Read a JSON transformation script as a list of step dicts"""
+    with open(config_file, 'r') as f:
+        transformations = json.load(f)
+    if not isinstance(transformations, list):
+        transformations = [transformations]
+    return transformations
+
+
+class Step:
+    def __init__(self, number, operation, params):
+        self.number = number  # 1-based position in the script
+        self.operation = operation
+        self.params = params
+
+    @property
+    def table(self):
+        return self.params["table_name"]
+
+    def __repr__(self):
+        return f"step {self.number} ({self.operation})"
+
+
+class Group:
+    """Steps executed together: one ALTER, one transaction, one fused UPDATE, or a single step"""
+    def __init__(self, kind, table, steps, clauses=None, assignments=None):
+        self.kind = kind  # "alter", "dml", "fused" or "single"
+        self.table = table
+        self.steps = steps
+        self.clauses = clauses or []
+        self.assignments = assignments or []  # fused: (column, expression) in SET order
+
+
+class Effect:
+    """What a row-local operation does to each row, as SQL.
+
+    `assignments` maps every column the step writes to an expression over
+    the row as it was before the step, with columns quoted in backticks
+    (e.g. {"name": "LOWER(`name`)"}). `clauses` are ALTER TABLE clauses the
+    step needs first, such as ("add", column, data_type) for the column it fills.
+    """
+    def __init__(self, assignments, clauses=()):
+        self.assignments = dict(assignments)
+        self.clauses = list(clauses)
+
+
+class Fusion:
+    """Consecutive row-local steps on one table folded into a single UPDATE.
+
+    Each written column keeps one expression over the row as it was before
+    the first step: a step's references to columns written by earlier steps
+    are replaced by those columns' expressions. MySQL evaluates SET
+    assignments left to right and later ones see the values written by
+    earlier ones, so a column is only assigned after every expression that
+    reads it; steps that would make that impossible (e.g. swapping two
+    columns) start a new UPDATE.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.steps = []
+        self.clauses = []
+        self.assignments = OrderedDict()  # lowercased column -> (column, expression)
+        self.order = []
+
+    def add(self, step, effect):
+        """Fold `step` in; False (and nothing changed) if it cannot join this UPDATE"""
+        assignments = OrderedDict(self.assignments)
+        for column, expression in effect.assignments.items():
+            assignments.pop(column.lower(), None)  # re-assigned columns move to the end
+            assignments[column.lower()] = (column, self.substitute(expression))
+        order = self.set_order(assignments)
+        if order is None:
+            return False
+        self.steps.append(step)
+        self.clauses.extend(effect.clauses)
+        self.assignments = assignments
+        self.order = order
+        return True
+
+    def substitute(self, expression):
+        """`expression` with the columns written so far replaced by their expressions"""
+        def replace(match):
+            written = self.assignments.get(match.group(1).lower())
+            return f"({written[1]})" if written else match.group(0)
+        return _COLUMN_REF.sub(replace, expression)
+
+    @staticmethod
+    def set_order(assignments):
+        """(column, expression) pairs with every column after the expressions reading it, or None on a cycle"""
+        readers = {column: set() for column in assignments}
+        for reader, (_, expression) in assignments.items():
+            for match in _COLUMN_REF.finditer(expression):
+                column = match.group(1).lower()
+                if column in readers and column != reader:
+                    readers[column].add(reader)
+        order = []
+        pending = list(assignments)
+        while pending:
+            ready = [column for column in pending if not readers[column] - set(order)]
+            if not ready:
+                return None
+            order.append(ready[0])
+            pending.remove(ready[0])
+        return [assignments[column] for column in order]
+
+    def group(self):
+        return Group("fused", self.table, self.steps, self.clauses, self.order)
+
+
+class PlannedTable:
+    """Columns of a table as they will be after the steps planned so far"""
+    def __init__(self, schema):
+        self.columns = OrderedDict()
+        for column in schema.columns:
+            self.columns[column["name"].lower()] = {
+                "name": column["name"],
+                "data_type": column["data_type"],
+                "has_fk": column["has_fk"],
+            }
+
+    def has(self, column_name):
+        return str(column_name).lower() in self.columns
+
+    def get(self, column_name):
+        return self.columns.get(str(column_name).lower())
+
+    def add(self, column_name, data_type):
+        self.columns[column_name.lower()] = {
+            "name": column_name,
+            "data_type": data_type.split("(")[0].strip().lower(),
+            "has_fk": False,
+        }
+
+    def rename(self, old, new):
+        column = self.columns.pop(old.lower())
+        column["name"] = new
+        self.columns[new.lower()] = column
+
+    def drop(self, column_name):
+        self.columns.pop(column_name.lower())
+
+
+class ScriptEngine:
+    """Plans and runs a transformation script against the database.
+
+    Every step is validated against a simulated copy of the table schema
+    before anything runs. Consecutive column changes on one table are merged
+    into a single ALTER TABLE, and consecutive row changes run inside one
+    transaction, so a failing step rolls back its whole group. Consecutive
+    row-local steps on one table whose operations declare an Effect are
+    fused into one UPDATE, so the table is read and written once.
+    """
+    def __init__(self, db, transform_mgr):
+        self.db = db
+        self.transform_mgr = transform_mgr
+
+    def run(self, transformations, default_table=None):
+        """Validate and execute a script; returns a summary dict"""
+        started = time.perf_counter()
+        groups = self.plan(transformations, default_table)
+        applied = 0
+        for group in groups:
+            try:
+                self._run_group(group)
+            except Exception as e:
+                first = group.steps[0].number
+                done = f"steps 1-{first - 1} were applied" if first > 1 else "nothing was applied"
+                if group.kind == "dml":
+                    failed = f"Transaction for steps {first}-{group.steps[-1].number} rolled back"
+                elif group.kind == "alter":
+                    failed = f"ALTER TABLE for steps {first}-{group.steps[-1].number} failed"
+                elif group.kind == "fused":
+                    failed = f"Fused update for steps {first}-{group.steps[-1].number} failed"
+                else:
+                    failed = f"{group.steps[0]!r} failed"
+                raise ScriptError(f"{failed}: {e} ({done})") from e
+            applied += len(group.steps)
+        summary = {
+            "steps": applied,
+            "statements": sum(len(g.steps) if g.kind == "dml" else 1 + bool(g.kind == "fused" and g.clauses)
+                              for g in groups),
+            "alter_statements": sum(1 for g in groups if g.kind == "alter" or (g.kind == "fused" and g.clauses)),
+            "transactions": sum(1 for g in groups if g.kind == "dml"),
+            "fused_updates": sum(1 for g in groups if g.kind == "fused"),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info("Script finished: %s", summary)
+        return summary
+
+    def plan(self, transformations, default_table=None):
+        """Validate every step and group them; raises ScriptError listing all problems"""
+        steps = []
+        errors = []
+        tables = {}
+        for number, transform in enumerate(transformations, start=1):
+            if not isinstance(transform, dict) or "operation" not in transform:
+                errors.append(f"Step {number}: missing 'operation'")
+                continue
+            params = dict(transform)
+            operation = params.pop("operation")
+            # Inject default table if missing
+            if "table_name" not in params and default_table:
+                params["table_name"] = default_table
+            step = Step(number, operation, params)
+            try:
+                self._validate(step, tables)
+                steps.append(step)
+            except ScriptError as e:
+                errors.append(f"Step {number} ({operation}): {e}")
+        if errors:
+            raise ScriptError("Script validation failed:\n" + "\n".join(errors))
+        return self._group(steps)
+
+    def _validate(self, step, tables):
+        func = self.transform_mgr.operations.get(step.operation)
+        if func is None:
+            raise ScriptError(f"Unknown operation: {step.operation}")
+        if "table_name" not in step.params:
+            raise ScriptError("JSON must specify 'table' or a table must be selected in the GUI.")
+        try:
+            inspect.signature(func).bind(**step.params)
+        except TypeError as e:
+            raise ScriptError(f"Bad parameters: {e}")
+
+        table = tables.get(step.table)
+        if table is None:
+            schema = self.db.schema.table(step.table)
+            if schema is None:
+                raise ScriptError(f"Table '{step.table}' does not exist")
+            table = tables[step.table] = PlannedTable(schema)
+
+        def require(*columns):
+            for column in columns:
+                if not table.has(column):
+                    raise ScriptError(f"Column '{column}' does not exist in '{step.table}'")
+
+        p = step.params
+        if step.operation == "add_column":
+            if table.has(p["column_name"]):
+                raise ScriptError(f"Column '{p['column_name']}' already exists")
+            table.add(p["column_name"], p.get("data_type", "VARCHAR(255)"))
+        elif step.operation == "rename_column":
+            require(p["old_col_name"])
+            if p["new_col_name"].lower() != p["old_col_name"].lower() and table.has(p["new_col_name"]):
+                raise ScriptError(f"Column '{p['new_col_name']}' already exists")
+            table.rename(p["old_col_name"], p["new_col_name"])
+        elif step.operation == "remove_column":
+            require(p["column_name"])
+            if table.get(p["column_name"])["has_fk"]:
+                raise ScriptError("Column is referenced in foreign key constraints!")
+            table.drop(p["column_name"])
+        elif step.operation == "merge_columns":
+            require(*p["source_columns"])
+            for column in p["source_columns"]:
+                data_type = table.get(column)["data_type"]
+                if "char" not in data_type:
+                    raise ScriptError(f"Cannot merge non-string column: {column} (type: {data_type})")
+            if table.has(p["new_column"]):
+                raise ScriptError(f"Column '{p['new_column']}' already exists")
+            if p.get("mode", "materialize") not in MERGE_MODES:
+                raise ScriptError(f"Unknown merge mode '{p['mode']}' (use {', '.join(MERGE_MODES)})")
+            table.add(p["new_column"], "VARCHAR(255)")
+        elif step.operation == "insert_row":
+            require(*p["values_dict"])
+        elif step.operation == "update_row":
+            require(p["pk_column"], *p["updates_dict"])
+        elif step.operation == "delete_row":
+            require(p["pk_column"])
+        elif step.operation == "conditional_update":
+            require(*p["conditions"], *p["updates"])
+        elif "column_name" in p:
+            # Plugin operations working on one existing column (e.g. lowercase_column)
+            require(p["column_name"])
+
+    def _group(self, steps):
+        transactional = DML_OPERATIONS | getattr(self.transform_mgr, "transactional", set())
+        groups = []
+        for step in self._fuse(steps):
+            if isinstance(step, Group):
+                groups.append(step)
+                continue
+            last = groups[-1] if groups else None
+            if step.operation in ALTER_OPERATIONS:
+                clause = self._clause(step)
+                if (last is not None and last.kind == "alter" and last.table == step.table
+                        and not self._conflicts(last.clauses, clause)):
+                    last.steps.append(step)
+                    last.clauses.append(clause)
+                else:
+                    groups.append(Group("alter", step.table, [step], [clause]))
+            elif step.operation in transactional:
+                if last is not None and last.kind == "dml":
+                    last.steps.append(step)
+                else:
+                    groups.append(Group("dml", step.table, [step]))
+            else:
+                groups.append(Group("single", step.table, [step]))
+        return groups
+
+    def _fuse(self, steps):
+        """`steps` with each run of two or more fusible steps on one table replaced by a "fused" Group"""
+        items = []
+        fusion = None
+
+        def close():
+            if fusion is not None:
+                items.extend([fusion.group()] if len(fusion.steps) > 1 else fusion.steps)
+
+        for step in steps:
+            effect = self._effect(step)
+            if effect is None:
+                close()
+                fusion = None
+                items.append(step)
+                continue
+            if (fusion is not None and fusion.table == step.table
+                    and not self._conflicts(fusion.clauses, *effect.clauses) and fusion.add(step, effect)):
+                continue
+            close()
+            fusion = Fusion(step.table)
+            if not fusion.add(step, effect):
+                fusion = None
+                items.append(step)
+        close()
+        return items
+
+    def _effect(self, step):
+        """The step's Effect if its operation declares one for these parameters"""
+        declare = getattr(self.transform_mgr, "effects", {}).get(step.operation)
+        effect = declare(**step.params) if declare else None
+        if isinstance(effect, dict):
+            effect = Effect(effect)
+        return effect
+
+    @staticmethod
+    def _clause(step):
+        p = step.params
+        if step.operation == "add_column":
+            return ("add", p["column_name"], p.get("data_type", "VARCHAR(255)"))
+        elif step.operation == "rename_column":
+            return ("rename", p["old_col_name"], p["new_col_name"])
+        return ("drop", p["column_name"])
+
+    @staticmethod
+    def _columns(clause):
+        names = clause[1:3] if clause[0] == "rename" else clause[1:2]
+        return {name.lower() for name in names}
+
+    def _conflicts(self, clauses, *new_clauses):
+        """MySQL resolves every clause of one ALTER against the original table, so a
+        clause may not touch a column that an earlier clause in the statement touched"""
+        used = set()
+        for previous in clauses:
+            used |= self._columns(previous)
+        for clause in new_clauses:
+            if used & self._columns(clause):
+                return True
+            used |= self._columns(clause)
+        return False
+
+    def _run_group(self, group):
+        if group.kind == "alter":
+            if len(group.steps) == 1:
+                self._call(group.steps[0])
+            elif self.db.alter_table(group.table, group.clauses) is False:
+                raise ScriptError(str(self.db.last_error or "ALTER TABLE failed"))
+        elif group.kind == "dml":
+            with self.db.transaction():
+                for step in group.steps:
+                    try:
+                        self._call(step)
+                    except Exception as e:
+                        raise ScriptError(f"{step!r} failed: {e}") from e
+        elif group.kind == "fused":
+            self._run_fused(group)
+        else:
+            self._call(group.steps[0])
+
+    def _run_fused(self, group):
+        """The group's ALTER TABLE clauses, then one UPDATE for all of its steps"""
+        if group.clauses and self.db.alter_table(group.table, group.clauses) is False:
+            raise ScriptError(str(self.db.last_error or "ALTER TABLE failed"))
+        set_clause = ", ".join(f"`{column}` = {expression}" for column, expression in group.assignments)
+        logger.info("Fused %s into one UPDATE of %s", ", ".join(map(repr, group.steps)), group.table)
+        try:
+            self.db.update_rows(group.table, set_clause)
+        except Exception:
+            # Like a failed merge: drop the columns added for the steps
+            added = [("drop", clause[1]) for clause in group.clauses if clause[0] == "add"]
+            if added:
+                self.db.alter_table(group.table, added)
+            raise
+
+    def _call(self, step):
+        result = self.transform_mgr.operations[step.operation](**step.params)
+        if result is False:  # conditional_update returns a row count, which may be 0
+            raise ScriptError(str(self.db.last_error or "operation reported failure"))
+        return result
@@ -1,5 +1,5 @@
 
-from core.database import DATABASE
+from core.transformation import DATABASE
 
 if __name__ == "__main__":
     try:
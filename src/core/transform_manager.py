@@ -0,0 +1,271 @@
+import functools
+import importlib
+import logging
+import os
+import re
+import sys
+
+from .script_engine import Effect, ScriptEngine, load_script
+from .transformation import DATABASE
+
+logger = logging.getLogger(__name__)
+
+
+def get_base_path():
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    else:
+        # Go up two levels: core -> src -> project root
+        return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TransformManager:
+    """Registry of transformation operations (core and plugins) and their runner.
+
+    Has no GUI dependencies: errors go to `report_error(title, message)`,
+    which the GUI points at a messagebox and the CLI at its JSON output.
+    """
+    def __init__(self, report_error=None):
+        self.operations = {}
+        self.transactional = set()  # operations a script may batch into one transaction
+        self.effects = {}         # name -> effect(**params): the operation's Effect, for script fusion
+        self.jobs = None          # JobExecutor used by submit()
+        self.report_error = report_error  # report_error(title, message); defaults to the log
+        self.load_plugins() # Load plugins automatically
+        
+        self.register("add_column", self.add_column)
+        self.register("merge_columns", self.merge_columns, effect=self.merge_columns_effect)
+        self.register("rename_column", self.rename_column)
+        self.register("remove_column", self.remove_column)
+        self.register("conditional_update", self.conditional_update)
+        self.register("insert_row", self.insert_row)
+        self.register("delete_row", self.delete_row)
+        self.register("update_row", self.update_row)
+        
+
+    def register(self, name: str, func: callable, transactional: bool = False, effect: callable = None):
+        """Register a new operation with a unique name.
+
+        Mark row-level operations that only run DML as `transactional` so
+        scripts can group them into a single transaction. `effect(**params)`
+        describes what a row-local operation does to every row as an Effect
+        (or a {column: SQL expression} dict), or returns None when it cannot
+        for these parameters; scripts fuse such steps into one UPDATE.
+        """
+        self.operations[name] = func
+        if transactional:
+            self.transactional.add(name)
+        if effect is not None:
+            self.effects[name] = effect
+
+    def register_vectorized(self, name, func, arrays="series"):
+        """Register func(values) -> new values as operation `name(table_name, column_name, output_column=None)`.
+
+        func works on a whole batch of a column at once: it gets a pandas
+        Series (a NumPy array with arrays="numpy") and returns as many new
+        values. DATABASE.vectorized streams the table through it and writes
+        back the rows it changed, into `output_column` if one is given.
+        """
+        def operation(table_name, column_name, output_column=None):
+            return DATABASE.vectorized.run(table_name, func, [column_name], [output_column or column_name],
+                                           arrays=arrays)
+        operation.__name__ = name
+        operation.__doc__ = func.__doc__
+        self.register(name, operation)
+
+    def execute(self, operation_name, **params):
+        """Execute a registered operation by name with given parameters."""
+        try:
+            func = self.operations[operation_name]
+        except KeyError:
+            self._report_error("Error", f"Unknown operation: {operation_name}")
+            return False
+        DATABASE.last_error = None
+        try:
+            result = func(**params)
+        except Exception as e:
+            self._report_error("Error", str(e))
+            return False           
+        # The data layer returns False and keeps the reason in DATABASE.last_error
+        if result is False and DATABASE.last_error is not None:
+            self._report_error("Database Error", str(DATABASE.last_error))
+        return result
+
+    def submit(self, operation_name, on_done=None, on_error=None, on_changes=None, **params):
+        """Execute an operation on the job executor; on_done gets its result on the UI thread.
+
+        With `on_changes`, the operation runs under DATABASE.track_changes()
+        and on_changes(changeset) is called before on_done.
+        """
+        work = functools.partial(self.execute, operation_name, **params)
+        name = operation_name.replace("_", " ")
+        if on_changes is not None:
+            return self.submit_tracked(work, on_changes=on_changes, on_done=on_done, on_error=on_error, name=name)
+        if self.jobs is None:
+            result = work()
+            if on_done:
+                on_done(result)
+            return None
+        return self.jobs.submit(work, name=name, on_done=on_done, on_error=on_error)
+
+    def submit_tracked(self, func, *args, on_changes, on_done=None, on_error=None, name=None, **kwargs):
+        """Run func(*args, **kwargs) on the job executor and report the rows it changed.
+
+        on_changes(changeset) and then on_done(result) are called on the UI thread.
+        """
+        def run():
+            with DATABASE.track_changes() as changes:
+                result = func(*args, **kwargs)
+            return result, changes
+
+        def done(outcome):
+            result, changes = outcome
+            on_changes(changes)
+            if on_done:
+                on_done(result)
+
+        if self.jobs is None:
+            done(run())
+            return None
+        return self.jobs.submit(run, name=name or getattr(func, "__name__", "operation"),
+                                on_done=done, on_error=on_error)
+
+    def _report_error(self, title, message):
+        if self.report_error:
+            self.report_error(title, message)
+        else:
+            logger.error("%s: %s", title, message)
+
+    def load_transformations(self, config_file: str, default_table: str = None):
+        # open JSON; the engine validates every step before running any of them
+        transformations = load_script(config_file)
+        return ScriptEngine(DATABASE, self).run(transformations, default_table)
+
+
+    def merge_columns(self, table_name, source_columns, new_column, mode="materialize", index=False):
+        """Business logic: Merge columns using the database (mode: materialize, virtual or stored)."""
+        try:
+            success = DATABASE.merge_columns(table_name, source_columns, new_column, mode=mode, index=index)
+            return success
+        except Exception as e:
+            logger.warning("Merge failed: %s", e)
+            DATABASE.last_error = e
+            return False
+    
+    @staticmethod
+    def merge_columns_effect(table_name, source_columns, new_column, mode="materialize", index=False):
+        """Effect of a materializing merge: add the column, fill it with CONCAT_WS"""
+        if mode != "materialize" or index:
+            return None
+        concat_expr = "CONCAT_WS(' ', " + ", ".join(f"`{col}`" for col in source_columns) + ")"
+        return Effect({new_column: concat_expr}, [("add", new_column, "VARCHAR(255)")])
+
+    def insert_row(self, table_name, values_dict):
+        """ insert row operation"""
+        try:
+            succuss=DATABASE.dynamic_insert(table_name, values_dict)
+            return succuss
+        except Exception as e:
+            logger.warning("row insertion failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    def rename_column(self, table_name, old_col_name, new_col_name):
+        """Rename column operation."""
+        try:
+            success= DATABASE.rename_column(table_name, old_col_name, new_col_name)
+            return success
+        except Exception as e:
+            logger.warning("rename of column failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    #def insert_batch(self, table_name, values_list):
+        """Insert multiple rows in one operation."""
+        #success = True
+        #for values_dict in values_list:
+            #if not DATABASE.dynamic_insert(table_name, values_dict):
+                #success = False
+        #return success
+    
+    def delete_row(self, table_name, pk_column, primary_key_value):
+        """ delete row operation"""
+        try:
+            success= DATABASE.dynamic_delete(table_name, pk_column, primary_key_value)
+            return success
+        except Exception  as e:
+            logger.warning("Row deletion failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    def add_column(self, table_name, column_name, data_type):
+        """Add column operation."""
+        # Example: Validate column name
+        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", column_name):
+            raise ValueError("Invalid column name!")
+        try:
+            success= DATABASE.add_column(table_name, column_name, data_type)
+            return success
+        except Exception as e:
+            logger.warning("Adding column failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    def update_row(self, table_name, pk_column, old_pk_value, updates_dict):
+        """update row operation"""
+        try:
+            success = DATABASE.dynamic_update(table_name, pk_column, old_pk_value, updates_dict)
+            return success
+        except Exception as e:
+            logger.warning("Row updation failed: %s", e)
+            DATABASE.last_error = e
+            return False
+ 
+    def remove_column(self, table_name, column_name):
+        """Remove column operation."""
+        try: 
+            success = DATABASE.remove_column(table_name, column_name)
+            return success
+        except Exception as e:
+            logger.warning("Column Removal failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    def conditional_update(self, table_name, conditions, updates):
+        """Conditional update operation."""
+        try:
+            affected_rows = DATABASE.conditional_update(table_name, conditions, updates)
+            return affected_rows
+        except Exception as e:
+            logger.warning("Conditional update failed: %s", e)
+            DATABASE.last_error = e
+            return False
+
+    def load_plugins(self):
+        base_path = get_base_path()
+        if getattr(sys, 'frozen', False):
+        # For frozen app, plugins are in the same directory as executable
+            plugin_dir = os.path.join(os.path.dirname(sys.executable), "plugins")
+        else:
+        # For development, use relative path
+            plugin_dir = os.path.join(base_path, "plugins")
+        logger.debug("Looking for plugins in: %s", plugin_dir)
+        if not os.path.exists(plugin_dir):
+            logger.error("Directory '%s' not found!", plugin_dir)
+            # Create empty directory to prevent crashes
+            os.makedirs(plugin_dir, exist_ok=True)
+            return
+        logger.debug("Found plugins: %s", os.listdir(plugin_dir))
+        
+        for filename in os.listdir(plugin_dir):
+            if filename.endswith(".py") and not filename.startswith("__"):
+                module_name = filename[:-3]
+                try:
+                    module = importlib.import_module(f"plugins.{module_name}")
+                    if hasattr(module, "register_plugin"):
+                        module.register_plugin(self)
+                        logger.info("Loaded plugin %s; operations: %s", filename, list(self.operations.keys()))
+                    else:
+                        logger.warning("No register_plugin() in %s", filename)
+                except Exception as e:
+                    logger.error("Plugin %s failed: %s", filename, e)
@@ -0,0 +1,246 @@
+import logging
+import queue
+import threading
+import time
+
+from pymysql.cursors import SSCursor
+
+logger = logging.getLogger(__name__)
+
+STAGING_PREFIX = "_vectorized_stage_"
+
+# Queue marker: no more batches
+_DONE = object()
+
+
+class VectorizedUpdater:
+    """Runs a Python function over whole columns of a table, batch by batch.
+
+    The table is read in primary-key order through an unbuffered
+    (server-side) cursor on its own connection. Each batch of rows is
+    handed to the function as one pandas Series (or NumPy array) per input
+    column, and the rows whose values it changed are written to a temporary
+    staging table and applied with one UPDATE ... JOIN, committed per batch
+    on a second connection. Reading, computing and writing run on three
+    threads joined by bounded queues, so one batch is read and another
+    written while a third is computed. A row that another session changed
+    after it was read is left as it is: the join also matches the value
+    that was read.
+    """
+    def __init__(self, db, batch_size=10000, queue_depth=2):
+        self.db = db
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+
+    def run(self, table_name, func, columns, outputs=None, arrays="series", progress=None):
+        """Store func(*columns) in `outputs` (default: the first input column); returns rows changed.
+
+        func gets one pandas Series per input column (NumPy arrays with
+        arrays="numpy") and returns the new values, as many as it got: one
+        array-like for a single output, otherwise a sequence, dict or
+        DataFrame holding one per output column. `progress(rows_read,
+        rows_changed)` is called after every batch; raising from it stops
+        the run. Batches written before a failure stay committed.
+        """
+        import pandas as pd  # heavy; only loaded once a vectorized plugin runs
+
+        columns = list(columns)
+        outputs = list(outputs or columns[:1])
+        if arrays not in ("series", "numpy"):
+            raise ValueError(f"arrays must be 'series' or 'numpy', not '{arrays}'")
+        column_names, key_columns = self.db.get_table_columns(table_name)
+        if not key_columns:
+            raise ValueError(f"Table '{table_name}' has no primary key to write results back by")
+        known = {col.lower() for col in column_names}
+        missing = [col for col in dict.fromkeys(columns + outputs) if col.lower() not in known]
+        if missing:
+            raise ValueError(f"Column(s) {', '.join(missing)} not found in table '{table_name}'")
+        keys = {col.lower() for col in key_columns}
+        if any(col.lower() in keys for col in outputs):
+            raise ValueError("Primary key columns cannot be written by a vectorized operation")
+
+        read_columns = list(key_columns) + [col for col in dict.fromkeys(columns + outputs)
+                                            if col.lower() not in keys]
+        read_batches = queue.Queue(self.queue_depth)
+        write_batches = queue.Queue(self.queue_depth)
+        stop = threading.Event()
+        errors = []
+        stats = {"read": 0, "changed": 0, "stale": 0, "keys": []}
+
+        def stage(target, *args):
+            def run_stage():
+                try:
+                    target(*args)
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+            return threading.Thread(target=run_stage, name=f"{target.__name__} {table_name}", daemon=True)
+
+        threads = [stage(self._read, table_name, read_columns, key_columns, read_batches, stop),
+                   stage(self._write, table_name, key_columns, outputs, write_batches, stop, stats)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                rows = self._get(read_batches, stop)
+                if rows is _DONE:
+                    break
+                staged = self._compute(pd, func, rows, read_columns, len(key_columns), columns, outputs, arrays)
+                stats["read"] += len(rows)
+                if staged and not self._put(write_batches, staged, stop):
+                    break
+                if progress:
+                    progress(stats["read"], stats["changed"])
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            self._put(write_batches, _DONE, stop)
+            for thread in threads:
+                thread.join()
+            self._record_changes(table_name, stats)
+
+        if errors:
+            raise errors[0]
+        if stats["stale"]:
+            logger.info("%d rows of %s changed while the operation ran and were left as they were",
+                        stats["stale"], table_name)
+        logger.info("Vectorized %s on %s: %d rows read, %d changed in %.1fs", getattr(func, "__name__", "function"),
+                    table_name, stats["read"], stats["changed"], time.perf_counter() - started)
+        return stats["changed"]
+
+    def _read(self, table_name, read_columns, key_columns, batches, stop):
+        """Stream `table_name` in primary-key order into `batches`"""
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        query = f"SELECT {', '.join(f'`{col}`' for col in read_columns)} FROM `{table_name}` ORDER BY {key_list}"
+        conn = self.db.pool.acquire()
+        finished = False
+        try:
+            cursor = conn.cursor(SSCursor)
+            self.db._execute(cursor, query, track=False)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    finished = True
+                    break
+                if not self._put(batches, rows, stop):
+                    break
+            if finished:
+                cursor.close()
+        finally:
+            # An unbuffered result left half read would have to be read to the
+            # end before the connection could be reused, so it is closed instead
+            self.db.pool.release(conn, discard=not finished)
+            self._put(batches, _DONE, stop)
+
+    @staticmethod
+    def _compute(pd, func, rows, read_columns, key_count, columns, outputs, arrays):
+        """Staging rows (key..., new values..., values read...) of the rows func changed"""
+        frame = pd.DataFrame.from_records(rows, columns=read_columns)
+        values = [frame[col] for col in columns]
+        if arrays == "numpy":
+            values = [series.to_numpy() for series in values]
+        result = func(*values)
+        if len(outputs) == 1:
+            results = [result]
+        elif isinstance(result, (dict, pd.DataFrame)):
+            results = [result[col] for col in outputs]
+        else:
+            results = list(result)
+        if len(results) != len(outputs):
+            raise ValueError(f"Expected {len(outputs)} result columns, got {len(results)}")
+
+        changed = pd.Series(False, index=frame.index)
+        new_values = []
+        for col, result in zip(outputs, results):
+            new = result.reset_index(drop=True) if isinstance(result, pd.Series) else pd.Series(result)
+            if len(new) != len(rows):
+                raise ValueError(f"Expected {len(rows)} values for '{col}', got {len(new)}")
+            old = frame[col]
+            same = (new == old) | (new.isna() & old.isna())
+            changed |= ~same.fillna(False).astype(bool)
+            new = new.astype(object)
+            new_values.append(new.where(new.notna(), None).tolist())
+
+        positions = [read_columns.index(col) for col in outputs]
+        return [row[:key_count] + tuple(new[i] for new in new_values) + tuple(row[p] for p in positions)
+                for i, (row, keep) in enumerate(zip(rows, changed.tolist())) if keep]
+
+    def _write(self, table_name, key_columns, outputs, batches, stop, stats):
+        """Apply staged batches from `batches` to `table_name`, one committed UPDATE ... JOIN each"""
+        from .database import CHANGE_KEY_LIMIT
+
+        staging = STAGING_PREFIX + table_name[:40]
+        key_list = ", ".join(f"`{col}`" for col in key_columns)
+        value_list = ", ".join(f"`{col}` AS `v{i}`, `{col}` AS `p{i}`" for i, col in enumerate(outputs))
+        staged_columns = ([f"`{col}`" for col in key_columns] + [f"`v{i}`" for i in range(len(outputs))]
+                          + [f"`p{i}`" for i in range(len(outputs))])
+        insert = (f"INSERT INTO `{staging}` ({', '.join(staged_columns)}) "
+                  f"VALUES ({', '.join(['%s'] * len(staged_columns))})")
+        join = " AND ".join(f"target.`{col}` = staged.`{col}`" for col in key_columns)
+        assignments = ", ".join(f"target.`{col}` = staged.`v{i}`" for i, col in enumerate(outputs))
+        unchanged = " AND ".join(f"target.`{col}` <=> staged.`p{i}`" for i, col in enumerate(outputs))
+        update = (f"UPDATE `{table_name}` AS target JOIN `{staging}` AS staged ON {join} "
+                  f"SET {assignments} WHERE {unchanged}")
+
+        with self.db.checkout() as conn:
+            with conn.cursor() as cursor:
+                # Temporary: private to this connection and gone with it
+                self.db._execute(cursor, f"DROP TEMPORARY TABLE IF EXISTS `{staging}`", track=False)
+                self.db._execute(cursor, f"CREATE TEMPORARY TABLE `{staging}` (PRIMARY KEY ({key_list})) "
+                                         f"SELECT {key_list}, {value_list} FROM `{table_name}` LIMIT 0", track=False)
+            try:
+                while True:
+                    rows = self._get(batches, stop)
+                    if rows is _DONE:
+                        break
+                    try:
+                        with conn.cursor() as cursor:
+                            self.db._execute(cursor, f"DELETE FROM `{staging}`", track=False)
+                            self.db._execute(cursor, insert, rows, many=True, track=False)
+                            count = max(self.db._execute(cursor, update, track=False), 0)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    stats["changed"] += count
+                    stats["stale"] += max(len(rows) - count, 0)
+                    if stats["keys"] is not None:
+                        stats["keys"].extend(row[:len(key_columns)] for row in rows)
+                        if len(stats["keys"]) > CHANGE_KEY_LIMIT:
+                            stats["keys"] = None
+            finally:
+                try:
+                    with conn.cursor() as cursor:
+                        self.db._execute(cursor, f"DROP TEMPORARY TABLE IF EXISTS `{staging}`", track=False)
+                except Exception as e:
+                    logger.warning("Could not drop staging table %s: %s", staging, e)
+
+    def _record_changes(self, table_name, stats):
+        # Batches were written on the writer's thread, so the caller's
+        # track_changes() block is told about them here
+        changes = self.db._tracking()
+        if changes is not None and stats["changed"]:
+            changes.add(table_name, "updated", stats["keys"], stats["changed"])
+
+    @staticmethod
+    def _put(batches, item, stop):
+        """Queue `item`, waiting for room; False if the run was stopped first"""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(batches, stop):
+        """Next queued item, or _DONE once the run was stopped"""
+        while True:
+            try:
+                return batches.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
@@ -1,9 +1,11 @@
+import hashlib
 import io
 import os
 import sys
 import requests
 from PyPDF2 import PdfReader
 from docx import Document
+from core.jobs import JobCancelled
 
 # Global variable for magic instance
 _magic_instance = None
@@ -41,96 +43,229 @@ def get_magic_instance():
             raise
     return _magic_instance
 
-def extract_text(file_bytes, filename):
+MAX_SIZE = 10 * 1024 * 1024  # 10MB
+# PDFs with fewer pages than this are extracted in-process; a pool costs more than it saves
+PARALLEL_MIN_PAGES = 16
+PAGES_PER_TASK = 8
+
+DOCX_MIME = "vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+def sniff_mime(file_bytes):
+    """MIME type of a file, normalized to lower case (one libmagic call)"""
+    return get_magic_instance().from_buffer(file_bytes).lower()
+
+def content_hash(file_bytes):
+    """SHA-256 hex digest identifying a file's content"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+def document_kind(mime):
+    """'pdf', 'word' or None for a MIME type from sniff_mime()"""
+    if "pdf" in mime:
+        return "pdf"
+    if "word" in mime or DOCX_MIME in mime:
+        return "word"
+    return None
+
+# Functions below take an optional `cache`: any object with get(sha256) -> dict or
+# None and put(sha256, fields) that merges fields ("mime", "text", "metadata")
+# into the entry, such as DocumentDatabase.extraction_cache. On a hit the file
+# is not parsed at all.
+
+def _cached(cache, file_bytes, field):
+    if cache is None:
+        return None, None
+    sha256 = content_hash(file_bytes)
+    entry = cache.get(sha256)
+    return sha256, (entry or {}).get(field)
+
+def extract_text(file_bytes, filename, mime=None, cache=None):
+    sha256, text = _cached(cache, file_bytes, "text")
+    if text is not None:
+        return text
     try:
-        m = get_magic_instance()
         # Get MIME type instead of description
-        file_type = m.from_buffer(file_bytes)
-        
-        # Normalize MIME types for consistent comparison
-        normalized_file_type = file_type.lower()
+        file_type = mime or sniff_mime(file_bytes)
+        kind = document_kind(file_type)
         
-        if "pdf" in normalized_file_type:
-            return extract_text_from_pdf(file_bytes)
-        elif "word" in normalized_file_type or \
-             "vnd.openxmlformats-officedocument.wordprocessingml.document" in normalized_file_type:
-            return extract_text_from_docx(file_bytes)
+        if kind == "pdf":
+            text = extract_text_from_pdf(file_bytes)
+        elif kind == "word":
+            text = extract_text_from_docx(file_bytes)
         else:
             raise ValueError(f"Unsupported file type: {file_type} for {filename}")
             
     except Exception as e:
         raise ValueError(f"Text extraction failed for {filename}: {str(e)}")
-    
-def extract_text_from_pdf(file_bytes):
-    reader = PdfReader(io.BytesIO(file_bytes))
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
+    if cache is not None:
+        cache.put(sha256, {"mime": file_type, "text": text})
     return text
+    
+def extract_text_from_pdf(file_bytes, workers=None):
+    # One join at the end instead of text += per page
+    return "".join(page + "\n" for page in iter_pdf_pages(file_bytes, workers=workers))
 
-def extract_text_from_docx(file_bytes):
-    doc = Document(io.BytesIO(file_bytes))
+# --- parallel PDF page extraction -------------------------------------------
+
+_worker_reader = None
+
+def _init_pdf_worker(file_bytes):
+    """Process pool initializer: parse the PDF once per worker process"""
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(file_bytes))
+
+def _extract_pages(start, stop):
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def iter_pdf_pages(file_bytes, reader=None, workers=None):
+    """Yield the text of each PDF page in order, as soon as it is available.
+
+    Large documents are split into page ranges extracted by a process pool
+    (each worker parses the file once); small ones reuse `reader` in-process.
+    """
+    reader = reader or PdfReader(io.BytesIO(file_bytes))
+    total = len(reader.pages)
+    workers = workers or min(os.cpu_count() or 1, 8)
+    if workers < 2 or total < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    ranges = [(start, min(start + PAGES_PER_TASK, total)) for start in range(0, total, PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                             initializer=_init_pdf_worker, initargs=(file_bytes,)) as pool:
+        # Submit everything up front, then hand results out in page order
+        futures = [pool.submit(_extract_pages, start, stop) for start, stop in ranges]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+def extract_text_from_docx(file_bytes, doc=None):
+    doc = doc or Document(io.BytesIO(file_bytes))
     return "\n".join([para.text for para in doc.paragraphs])
 
-def get_file_metadata(file_bytes, filename):
-    m = get_magic_instance()
+# Parsed metadata does not depend on the file name, so it can be cached by content;
+# a missing title (None) becomes the file name in _file_metadata()
+def _pdf_metadata(reader):
+    info = reader.metadata or {}
+    return {
+        "author": info.get("/Author", "Unknown"),
+        "title": info.get("/Title"),
+        "created": info.get("/CreationDate", ""),
+        "modified": info.get("/ModDate", ""),
+        "pages": len(reader.pages)
+    }
+
+def _docx_metadata(doc):
+    return {
+        "author": doc.core_properties.author or "Unknown",
+        "created": str(doc.core_properties.created) if doc.core_properties.created else "",
+        "modified": str(doc.core_properties.modified) if doc.core_properties.modified else "",
+        "revision": doc.core_properties.revision
+    }
+
+def _file_metadata(file_bytes, filename, parsed):
+    metadata = {"size": len(file_bytes), "filename": filename}
+    metadata.update(parsed)
+    if "title" in metadata and metadata["title"] is None:
+        metadata["title"] = filename
+    return metadata
+
+def get_file_metadata(file_bytes, filename, mime=None, cache=None):
+    sha256, parsed = _cached(cache, file_bytes, "metadata")
+    if parsed is not None:
+        return _file_metadata(file_bytes, filename, parsed)
+
     # Get MIME type instead of description
-    file_type = m.from_buffer(file_bytes)
-    size = len(file_bytes)
-    metadata = {"size": size, "filename": filename}
+    file_type = mime or sniff_mime(file_bytes)
+    parsed = {}
     
     try:
-        # Normalize MIME types for consistent comparison
-        normalized_file_type = file_type.lower()
-        
-        if "pdf" in normalized_file_type:
-            reader = PdfReader(io.BytesIO(file_bytes))
-            metadata.update({
-                "author": reader.metadata.get("/Author", "Unknown"),
-                "title": reader.metadata.get("/Title", filename),
-                "created": reader.metadata.get("/CreationDate", ""),
-                "modified": reader.metadata.get("/ModDate", ""),
-                "pages": len(reader.pages)
-            })
-        elif "word" in normalized_file_type or \
-             "vnd.openxmlformats-officedocument.wordprocessingml.document" in normalized_file_type:
-            doc = Document(io.BytesIO(file_bytes))
-            metadata.update({
-                "author": doc.core_properties.author or "Unknown",
-                "created": str(doc.core_properties.created) if doc.core_properties.created else "",
-                "modified": str(doc.core_properties.modified) if doc.core_properties.modified else "",
-                "revision": doc.core_properties.revision
-            })
+        kind = document_kind(file_type)
+        if kind == "pdf":
+            parsed = _pdf_metadata(PdfReader(io.BytesIO(file_bytes)))
+        elif kind == "word":
+            parsed = _docx_metadata(Document(io.BytesIO(file_bytes)))
+        if cache is not None:
+            cache.put(sha256, {"mime": file_type, "metadata": parsed})
     except Exception:
         # Metadata extraction failed, but we still have basic info
         pass
     
-    return metadata
+    return _file_metadata(file_bytes, filename, parsed)
 
-def validate_file(file_bytes, filename):
+def validate_file(file_bytes, filename, mime=None):
     """Validate file type and size"""
-    MAX_SIZE = 10 * 1024 * 1024  # 10MB
-    
     if len(file_bytes) > MAX_SIZE:
         raise ValueError(f"File too large (max {MAX_SIZE//1024//1024}MB)")
     
-    m = get_magic_instance()
     # Get MIME type instead of description
-    file_type = m.from_buffer(file_bytes)
+    file_type = mime or sniff_mime(file_bytes)
     
     # Check for PDF or Word documents by MIME type patterns
-    normalized_file_type = file_type.lower()
     allowed_patterns = [
         "pdf",
         "msword",
-        "vnd.openxmlformats-officedocument.wordprocessingml.document"
+        DOCX_MIME
     ]
     
-    if not any(pattern in normalized_file_type for pattern in allowed_patterns):
+    if not any(pattern in file_type for pattern in allowed_patterns):
         raise ValueError(f"Unsupported file type: {file_type}")
     
     return True
 
+def ingest_document(file_bytes, filename, on_page=None, workers=None, cache=None):
+    """Validate, extract text and read metadata in one pass over the file.
+
+    The MIME type is sniffed once and the PDF/DOCX is parsed once in this
+    process, or not at all when `cache` already knows the content. PDF
+    pages are streamed to `on_page(done, total, text)` as they are
+    extracted. Returns {"mime", "text", "metadata", "sha256"}.
+    """
+    sha256 = content_hash(file_bytes)
+    entry = cache.get(sha256) if cache is not None else None
+    if entry and all(entry.get(field) is not None for field in ("mime", "text", "metadata")):
+        # Only validated files are cached; the size limit may have changed since
+        validate_file(file_bytes, filename, mime=entry["mime"])
+        return {"mime": entry["mime"], "text": entry["text"], "sha256": sha256,
+                "metadata": _file_metadata(file_bytes, filename, entry["metadata"])}
+
+    mime = sniff_mime(file_bytes)
+    validate_file(file_bytes, filename, mime=mime)
+    parsed = {}
+    try:
+        if document_kind(mime) == "pdf":
+            reader = PdfReader(io.BytesIO(file_bytes))
+            try:
+                parsed = _pdf_metadata(reader)
+            except Exception:
+                pass  # text is still worth having without metadata
+            total = len(reader.pages)
+            pages = []
+            for page_text in iter_pdf_pages(file_bytes, reader=reader, workers=workers):
+                pages.append(page_text)
+                if on_page:
+                    on_page(len(pages), total, page_text)
+            text = "".join(page + "\n" for page in pages)
+        else:
+            doc = Document(io.BytesIO(file_bytes))
+            try:
+                parsed = _docx_metadata(doc)
+            except Exception:
+                pass
+            text = extract_text_from_docx(file_bytes, doc=doc)
+    except JobCancelled:
+        raise  # raised by on_page; a cancelled upload is not a failed extraction
+    except Exception as e:
+        raise ValueError(f"Text extraction failed for {filename}: {str(e)}")
+    if cache is not None:
+        cache.put(sha256, {"mime": mime, "text": text, "metadata": parsed})
+    return {"mime": mime, "text": text, "sha256": sha256,
+            "metadata": _file_metadata(file_bytes, filename, parsed)}
+
 
 
 def scan_for_viruses(file_bytes):
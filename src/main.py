@@ -1,7 +1,11 @@
+import time
+_STARTED = time.perf_counter()  # for the startup timing report
+
 import os
 import sys
 import platform
 import ctypes
+import multiprocessing
 
 
 # Add the parent directory of src to sys.path
@@ -12,4 +16,6 @@ sys.path.insert(0, parent_dir)
 from src.gui.main_window import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # PDF text extraction uses a process pool; needed for frozen Windows builds
+    multiprocessing.freeze_support()
+    main(started=_STARTED)
\ No newline at end of file
@@ -2,18 +2,19 @@
 from core.transformation import DATABASE
 from jsonschema import validate, ValidationError
 import json
+import logging
 import config
+
+logger = logging.getLogger(__name__)
 def lowercase_column(table_name, column_name):
     """Convert a column's values to lowercase."""
-    # Example SQL: UPDATE `table` SET `column` = LOWER(`column`)
-    query = f"UPDATE `{table_name}` SET `{column_name}` = LOWER(`{column_name}`)"
-    return DATABASE._execute_sql(query)
+    # Example SQL: UPDATE `table` SET `column` = LOWER(`column`), batched on large tables
+    return DATABASE.update_rows(table_name, f"`{column_name}` = LOWER(`{column_name}`)")
 
 def uppercase_column(table_name, column_name):
     """Convert a column's values to uppercase."""
-    # Example SQL: UPDATE `table` SET `column` = LOWER(`column`)
-    query = f"UPDATE `{table_name}` SET `{column_name}` = UPPER(`{column_name}`)"
-    return DATABASE._execute_sql(query)
+    # Example SQL: UPDATE `table` SET `column` = UPPER(`column`), batched on large tables
+    return DATABASE.update_rows(table_name, f"`{column_name}` = UPPER(`{column_name}`)")
 
 def insert_batch(table_name, config):
     """Insert multiple rows into a table."""
@@ -23,7 +24,8 @@ def insert_batch(table_name, config):
         "properties": {
             "operation": {"type": "string"},
             "table_name": {"type": "string"},
-            "values_list": {"type": "array"}
+            "values_list": {"type": "array", "items": {"type": "object"}},
+            "chunk_size": {"type": "integer", "minimum": 1}
         },
         "required": ["values_list"]
     }
@@ -35,24 +37,39 @@ def insert_batch(table_name, config):
         # Extract the values list from config
         values_list = config["values_list"]
 
-        for row in values_list:
-            DATABASE.dynamic_insert(table_name, row)
+        # One multi-row INSERT and one commit per chunk instead of per row
+        result = DATABASE.bulk_insert(table_name, values_list, chunk_size=config.get("chunk_size", 1000))
+        failures = [f"chunk of {failure['rows']} rows starting at row {failure['first_row']}: {failure['error']}"
+                    for failure in result["failed"]]
+        for failure in failures:
+            logger.error("Batch insert into %s failed for %s", table_name, failure)
+        if failures:
+            # TransformManager.execute reports last_error to the GUI/CLI
+            DATABASE.last_error = ValueError(f"{len(failures)} of {result['chunks']} chunks failed: "
+                                             + "; ".join(failures))
+            return False
         return True
     except ValidationError as e:
         # Handle schema validation errors
-        print(f"JSON validation failed: {e.message}")
+        logger.error("JSON validation failed: %s", e.message)
+        DATABASE.last_error = ValueError(f"JSON validation failed: {e.message}")
         return False
     except json.JSONDecodeError as e:
         # Handle invalid JSON syntax
-        print(f"Invalid JSON: {str(e)}")
+        logger.error("Invalid JSON: %s", e)
+        DATABASE.last_error = e
         return False
     except Exception as e:
-        print(f"Batch insert failed: {e}")
-        return False 
+        logger.error("Batch insert failed: %s", e)
+        DATABASE.last_error = e
+        return False
 # Register with TransformManager
 def register_plugin(transform_mgr):
-    transform_mgr.register("lowercase_column", lowercase_column)
-    transform_mgr.register("uppercase_column", uppercase_column)
-    transform_mgr.register("insert_batch", insert_batch)
+    # The effects let scripts fuse consecutive column transforms into one UPDATE
+    transform_mgr.register("lowercase_column", lowercase_column, transactional=True,
+                           effect=lambda table_name, column_name: {column_name: f"LOWER(`{column_name}`)"})
+    transform_mgr.register("uppercase_column", uppercase_column, transactional=True,
+                           effect=lambda table_name, column_name: {column_name: f"UPPER(`{column_name}`)"})
+    transform_mgr.register("insert_batch", insert_batch, transactional=True)
 
 
@@ -0,0 +1,16 @@
+
+def title_case_column(values):
+    """Capitalize each word of a column's text values."""
+    # Whole-batch pandas string method; non-text values are left as they are
+    is_text = values.map(lambda value: isinstance(value, str))
+    return values.mask(is_text, values.str.title())
+
+def normalize_whitespace_column(values):
+    """Collapse runs of whitespace to one space and trim a column's text values."""
+    is_text = values.map(lambda value: isinstance(value, str))
+    return values.mask(is_text, values.str.replace(r"\s+", " ", regex=True).str.strip())
+
+# Register with TransformManager
+def register_plugin(transform_mgr):
+    transform_mgr.register_vectorized("title_case_column", title_case_column)
+    transform_mgr.register_vectorized("normalize_whitespace_column", normalize_whitespace_column)